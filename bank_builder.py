@@ -0,0 +1,154 @@
+##### Board bank builder - runs the generation pipeline on every core of a PC
+#
+#   python bank_builder.py -n 100 -o bank.txt
+#   python bank_builder.py -n 20 --grid large --difficulty difficult --cell 6,4
+#
+# Builds N validated boards per (grid size, difficulty, first-click cell), then reports boards/s
+# and how many attempts each accepted board took. One output line per board:
+#   grid difficulty first_x first_y attempts mines_hex      (mines bit y * GRID_W + x)
+# or, when the output file ends in .msb, the binary bank format of board_store.py.
+
+import argparse
+import random
+import sys
+import time
+from multiprocessing import Pool, cpu_count
+
+import engine
+import bitboard
+import board_pool
+import board_store
+
+
+##### one job: n boards for one (grid size, difficulty, first click), in its own process
+
+def build(job):
+    dim, difficulty, cx, cy, n, seed = job
+    random.seed(seed)
+
+    engine.set_grid(dim)
+    bitboard.set_grid(engine.GRID_W, engine.GRID_H)
+
+    boards = []
+    while len(boards) < n:
+        attempts = 0
+        while True:
+            attempts += 1
+            mines = bitboard.place_mines(cx, cy, engine.MINES)
+            if bitboard.solve_tier(mines, cx, cy, difficulty) == difficulty:
+                break
+        boards.append((attempts, board_pool.encode(bitboard.to_grid(mines))))
+
+    return dim, difficulty, cx, cy, boards
+
+
+##### attempts per accepted board: min / median / mean / 90th percentile / max, and a histogram
+
+def summary(attempts):
+    if not attempts: # -n 0
+        return "no boards", []
+
+    attempts = sorted(attempts)
+    n = len(attempts)
+    mean = sum(attempts) / n
+    line = (f"min {attempts[0]}  median {attempts[n // 2]}  mean {mean:.1f}  "
+            f"p90 {attempts[min(n - 1, n * 9 // 10)]}  max {attempts[-1]}")
+
+    buckets = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+    counts = [0] * len(buckets)
+    over = 0
+    for a in attempts:
+        for i in range(len(buckets)):
+            if a <= buckets[i]:
+                counts[i] += 1
+                break
+        else:
+            over += 1
+
+    hist = []
+    low = 1
+    for i in range(len(buckets)):
+        if counts[i]:
+            hist.append(f"    {low:>4}-{buckets[i]:<4} {counts[i]:7}  {'#' * max(1, 40 * counts[i] // n)}")
+        low = buckets[i] + 1
+    if over:
+        hist.append(f"    >{buckets[-1]:<8} {over:7}  {'#' * max(1, 40 * over // n)}")
+
+    return line, hist
+
+
+def parse_cells(text, grid_w, grid_h):
+    if text == "all":
+        return [(x, y) for y in range(grid_h) for x in range(grid_w)]
+
+    cells = []
+    for part in text.split(";"):
+        x, y = part.split(",")
+        cells.append((int(x), int(y)))
+    return cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a bank of validated Minesweeper boards.")
+    parser.add_argument("-n", "--boards", type=int, default=10,
+                        help="boards per (grid size, difficulty, first-click cell)")
+    parser.add_argument("--grid", nargs="+", default=list(engine.GRID_SIZES), choices=list(engine.GRID_SIZES))
+    parser.add_argument("--difficulty", nargs="+", default=list(engine.TIERS), choices=list(engine.TIERS))
+    parser.add_argument("--cell", default="all", help='first clicks as "x,y;x,y", or "all"')
+    parser.add_argument("-j", "--jobs", type=int, default=cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="file to write the boards to")
+    args = parser.parse_args()
+
+    jobs = []
+    seed = args.seed
+    for dim in args.grid:
+        grid_w, grid_h, _ = engine.GRID_SIZES[dim]
+        for difficulty in args.difficulty:
+            for cx, cy in parse_cells(args.cell, grid_w, grid_h):
+                jobs.append((dim, difficulty, cx, cy, args.boards, seed))
+                seed += 1
+
+    attempts = {}
+    binary = args.output is not None and args.output.endswith(".msb")
+    out = open(args.output, "w") if args.output and not binary else None
+    stored = []
+    start = time.time()
+    done = 0
+
+    with Pool(args.jobs) as pool:
+        for dim, difficulty, cx, cy, boards in pool.imap_unordered(build, jobs):
+            key = (dim, difficulty)
+            if key not in attempts:
+                attempts[key] = []
+            for a, mines in boards:
+                attempts[key].append(a)
+                if out:
+                    out.write(f"{dim} {difficulty} {cx} {cy} {a} {mines}\n")
+                if binary:
+                    grid_w, grid_h, n_mines = engine.GRID_SIZES[dim]
+                    stored.append((grid_w, grid_h, n_mines, engine.TIERS.index(difficulty), cx, cy, int(mines, 16)))
+
+            done += 1
+            if sys.stdout.isatty():
+                print(f"\r{done}/{len(jobs)} jobs", end="", flush=True)
+
+    elapsed = time.time() - start
+    if out:
+        out.close()
+    if binary:
+        board_store.write(args.output, stored)
+
+    total = sum(len(a) for a in attempts.values())
+    rate = total / elapsed if elapsed else 0.0
+    print(f"\r{total} boards in {elapsed:.1f} s on {args.jobs} processes: {rate:.1f} boards/s")
+    for dim in args.grid:
+        for difficulty in args.difficulty:
+            line, hist = summary(attempts.get((dim, difficulty), []))
+            print(f"{dim:6} {difficulty:9} attempts/board: {line}")
+            for h in hist:
+                print(h)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+##### Batch board generation with NumPy (host only - there is no NumPy on the Tufty)
+# Lays out mines for a whole batch of boards at once and computes all their number grids with one
+# 3x3 convolution. Placement follows engine.place_mines_avoiding draw for draw: a uniform tile,
+# never in the first-click 3x3, never on a mine, and rejected 80% of the time when too_close().
+# Solving still happens board by board, on the bitboard backend.
+
+import time
+import numpy as np
+
+import engine
+import bitboard
+
+
+##### Place mines on a batch of boards, avoiding the first revealed tile and its neighbours
+
+def place_mines_batch(count, grid_w, grid_h, n_mines, cx, cy, rng):
+    mines = np.zeros((count, grid_h, grid_w), dtype=bool)
+    # near[b, y + 1, x + 1] = mines in the 3x3 around (x, y), padded so edges need no checks
+    near = np.zeros((count, grid_h + 2, grid_w + 2), dtype=np.int8)
+
+    excluded = np.zeros((grid_h, grid_w), dtype=bool)
+    excluded[max(0, cy - 1):cy + 2, max(0, cx - 1):cx + 2] = True
+
+    placed = np.zeros(count, dtype=np.int32)
+    todo = np.arange(count)
+
+    while todo.size:
+        # one draw per unfinished board, as one pass of the while loop in place_mines_avoiding
+        x = rng.integers(0, grid_w, todo.size)
+        y = rng.integers(0, grid_h, todo.size)
+        keep = rng.random(todo.size) >= 0.8 # survives the too_close() rejection
+
+        ok = ~excluded[y, x] & ~mines[todo, y, x]
+        ok &= (near[todo, y + 1, x + 1] == 0) | keep
+
+        b, x, y = todo[ok], x[ok], y[ok]
+        mines[b, y, x] = True
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                near[b, y + dy, x + dx] += 1
+
+        placed[b] += 1
+        todo = todo[placed[todo] < n_mines]
+
+    return mines
+
+
+##### Count neighbouring mines for every tile of every board: one 3x3 convolution
+
+def compute_numbers_batch(mines):
+    count, grid_h, grid_w = mines.shape
+    padded = np.zeros((count, grid_h + 2, grid_w + 2), dtype=np.int8)
+    padded[:, 1:-1, 1:-1] = mines
+
+    numbers = np.zeros((count, grid_h, grid_w), dtype=np.int8)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                numbers += padded[:, dy:dy + grid_h, dx:dx + grid_w]
+
+    numbers[mines] = 0
+    return numbers
+
+
+##### batch -> bitboard layers (grid set up with bitboard.set_grid first)
+
+def _layers(mines, numbers):
+    count, grid_h, grid_w = mines.shape
+    stride = bitboard.STRIDE
+
+    def pack(layer): # (count, grid_h, grid_w) bool -> one int per board, bit y * STRIDE + x
+        padded = np.zeros((count, grid_h, stride), dtype=bool)
+        padded[:, :, :grid_w] = layer
+        packed = np.packbits(padded.reshape(count, -1), axis=1, bitorder="little")
+        return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+    padded_numbers = np.zeros((count, grid_h, stride), dtype=np.int8)
+    padded_numbers[:, :, :grid_w] = numbers
+    nums = padded_numbers.reshape(count, -1).tolist()
+
+    return pack(mines), pack(~mines & (numbers == 0)), nums
+
+
+##### Generate count candidates and keep those matching the difficulty
+# Returns a (boards, grid_h, grid_w) bool array of mine layouts.
+
+def generate_batch(dim, difficulty, count, cx, cy, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+
+    grid_w, grid_h, n_mines = engine.GRID_SIZES[dim]
+    engine.set_grid(dim)
+    bitboard.set_grid(grid_w, grid_h)
+
+    mines = place_mines_batch(count, grid_w, grid_h, n_mines, cx, cy, rng)
+    numbers = compute_numbers_batch(mines)
+
+    keep = []
+    for b, (m, zero, nums) in enumerate(zip(*_layers(mines, numbers))):
+        if bitboard.solve_tier(m, cx, cy, difficulty, zero, nums) == difficulty:
+            keep.append(b)
+
+    return mines[keep]
+
+
+##### throughput: python batch_gen.py
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    for dim in ("small", "medium", "large"):
+        grid_w, grid_h, n_mines = engine.GRID_SIZES[dim]
+        cx, cy = grid_w // 2, grid_h // 2
+
+        start = time.perf_counter()
+        mines = place_mines_batch(10000, grid_w, grid_h, n_mines, cx, cy, rng)
+        compute_numbers_batch(mines)
+        layout = time.perf_counter() - start
+
+        for difficulty in ("easy", "medium", "difficult"):
+            start = time.perf_counter()
+            boards = generate_batch(dim, difficulty, 2000, cx, cy, rng)
+            elapsed = time.perf_counter() - start
+            print(f"{dim:6} {difficulty:9} {len(boards) / elapsed:8.1f} boards/s "
+                  f"({len(boards)}/2000 accepted)   layout + numbers {10000 / layout:9.0f} boards/s")
@@ -0,0 +1,144 @@
+##### Benchmarks - same code under CPython (python bench.py) and on the Tufty (import bench)
+# Times the board-generation loop per grid size / difficulty, and one frame of the game loop
+# drawn to the stand-in display.
+
+import headless
+headless.install() # before mine_sweeper is imported, so it picks up the stand-ins
+
+import random
+import time
+import engine
+import mine_sweeper
+
+if not hasattr(time, "ticks_us"): # CPython
+    from headless import clock as time
+
+
+##### board generation: attempts and time per accepted board
+
+def bench_generation(dim, difficulty, boards=5, seed=1, bitboard=False, search_steps=0):
+    random.seed(seed)
+    engine.set_grid(dim)
+    engine.BITBOARD = bitboard
+    engine.SEARCH_STEPS = search_steps
+    cx = engine.GRID_W // 2
+    cy = engine.GRID_H // 2
+
+    # seeded attempts: the same boards on CPython and on the Tufty
+    attempts = 0
+    start = time.ticks_us()
+    for _ in range(boards):
+        attempts += engine.generate_board(difficulty, cx, cy, first_seed=seed + attempts)
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    engine.BITBOARD = False
+    engine.SEARCH_STEPS = 0
+
+    backend = "ls" if search_steps else "bb" if bitboard else ""
+    print(f"generate {dim:6} {difficulty:9} {backend:2} {elapsed / boards / 1000:9.1f} ms/board  "
+          f"{attempts / boards:6.1f} attempts/board  {elapsed / attempts / 1000:7.2f} ms/attempt")
+    return elapsed, attempts
+
+
+##### one board, replayed from its seed: python bench.py large 5 6 4 [repeat]
+# For boards that were slow or failed somewhere else - only the solver is timed.
+
+def bench_board(dim, board_seed, cx, cy, repeat=20):
+    engine.set_grid(dim)
+    engine.new_board(cx, cy, board_seed)
+
+    start = time.ticks_us()
+    for _ in range(repeat):
+        tier = engine.solve_tier(cx, cy)
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+
+    print(f"board    {dim:6} seed {board_seed} first click {cx},{cy}: {tier:11} {elapsed / repeat / 1000:9.2f} ms/solve")
+    return tier, elapsed
+
+
+##### one frame of the main loop, after the first click
+
+def bench_frame(dim, frames=50, seed=1):
+    random.seed(seed)
+    mine_sweeper.reset_game()
+    mine_sweeper.setup_grid(dim)
+    mine_sweeper.use_solver = False
+    mine_sweeper.use_flood = True
+
+    # first frame: press reveal on the top left tile
+    mine_sweeper.button_reveal.feed([True, False])
+    mine_sweeper.play_frame()
+    headless.step()
+
+    # then walk the cursor to the right and back, one button edge every other frame
+    # both scripts get an entry every frame, so they stay in step
+    for i in range(frames):
+        right = (i // engine.GRID_W) % 2 == 0
+        mine_sweeper.button_right.feed([right and i % 2 == 0])
+        mine_sweeper.button_left.feed([not right and i % 2 == 0])
+
+    display = mine_sweeper.display
+    display.reset_counts()
+    start = time.ticks_us()
+    for _ in range(frames):
+        mine_sweeper.play_frame()
+        headless.step()
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+
+    calls = display.calls
+    print(f"frame    {dim:6} {elapsed / frames / 1000:9.2f} ms/frame  "
+          f"{display.draw_calls() / frames:6.1f} draws/frame  "
+          f"{calls.get('text', 0) / frames:5.1f} texts/frame  {calls.get('update', 0) / frames:4.1f} updates/frame")
+    return elapsed
+
+
+def bench_repeat(dim, held_ms=1200):
+    # hold right with the real clock running: one move on the press, then the auto-repeat
+    mine_sweeper.reset_game()
+    mine_sweeper.setup_grid(dim)
+    mine_sweeper.use_solver = False
+
+    frames = held_ms // mine_sweeper.FRAME_MS
+    mine_sweeper.button_right.feed([True] * frames + [False])
+    start = time.ticks_ms()
+    for _ in range(frames + 1):
+        mine_sweeper.play_frame()
+        headless.step()
+        time.sleep_ms(mine_sweeper.FRAME_MS)
+    held = time.ticks_diff(time.ticks_ms(), start)
+
+    print(f"repeat   {dim:6} right held {held} ms: cursor at x = {mine_sweeper.cursor_x} of {engine.GRID_W - 1}")
+    return mine_sweeper.cursor_x
+
+
+def run():
+    for dim in ("small", "medium", "large"):
+        for difficulty in ("easy", "medium", "difficult"):
+            bench_generation(dim, difficulty)
+            bench_generation(dim, difficulty, bitboard=True)
+        bench_generation(dim, "difficult", search_steps=50)
+    info = engine.cache_info()
+    entries, hit_rate, evictions = info["entries"], info["hit_rate"], info["evictions"]
+    print(f"group cache {entries}/{engine.GROUP_CACHE_SIZE} entries  {hit_rate * 100:.1f}% hits  {evictions} evictions")
+    for dim in ("small", "medium", "large"):
+        bench_frame(dim)
+    bench_repeat("large")
+
+
+def run_metrics(dim="medium"): # solver / generation metrics for the engine solvers (metrics.py)
+    import metrics
+    metrics.reset()
+    metrics.enable()
+    for difficulty in ("easy", "medium", "difficult"):
+        bench_generation(dim, difficulty)
+    metrics.disable()
+    metrics.report()
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) >= 2 and sys.argv[1] == "metrics":
+        run_metrics(*sys.argv[2:3])
+    elif len(sys.argv) >= 5:
+        bench_board(sys.argv[1], *[int(a) for a in sys.argv[2:6]])
+    else:
+        run()
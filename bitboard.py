@@ -0,0 +1,470 @@
+##### Bitboard board backend
+# Each layer (mines, revealed, flags) is a single integer: tile (x, y) is bit y * STRIDE + x.
+# STRIDE = GRID_W + 1, the extra column is always 0, so shifting a layer by one tile in any
+# direction never wraps onto the next row. Neighbour counts, flood fill and the win check become
+# shifts and masks; the solvers follow engine.py rule for rule and give the same answers.
+
+import random
+import engine
+
+
+STRIDE = 0
+FULL = 0        # every real tile of the grid
+NMASK = []      # bit index -> mask of its neighbours
+BIT_INDEX = {}  # 1 << i -> i
+_grid = None
+_tables = {}    # (GRID_W, GRID_H) -> (STRIDE, FULL, NMASK, BIT_INDEX)
+
+
+##### set up shift width and neighbour masks for a grid size (done once per size)
+
+def set_grid(grid_w, grid_h):
+    global STRIDE, FULL, NMASK, BIT_INDEX, _grid
+
+    if _grid == (grid_w, grid_h):
+        return
+    _grid = (grid_w, grid_h)
+
+    if _grid not in _tables:
+        stride = grid_w + 1
+        full = 0
+        for y in range(grid_h):
+            full |= ((1 << grid_w) - 1) << (y * stride)
+
+        neighbours = engine.build_neighbours(grid_w, grid_h)
+        nmask = [0] * (grid_h * stride)
+        for y in range(grid_h):
+            for x in range(grid_w):
+                m = 0
+                for nx, ny in neighbours[y][x]:
+                    m |= 1 << (ny * stride + nx)
+                nmask[y * stride + x] = m
+
+        bit_index = {}
+        for i in range(grid_h * stride):
+            bit_index[1 << i] = i
+
+        _tables[_grid] = (stride, full, nmask, bit_index)
+
+    STRIDE, FULL, NMASK, BIT_INDEX = _tables[_grid]
+
+
+##### conversions
+
+def bit(x, y):
+    return 1 << (y * STRIDE + x)
+
+def from_grid(grid):
+    b = 0
+    for y in range(len(grid)):
+        row = grid[y]
+        for x in range(len(row)):
+            if row[x]:
+                b |= 1 << (y * STRIDE + x)
+    return b
+
+def to_grid(b):
+    grid_w, grid_h = _grid
+    return [[bool(b >> (y * STRIDE + x) & 1) for x in range(grid_w)] for y in range(grid_h)]
+
+def bits(b): # bit indices of a layer, lowest first
+    while b:
+        low = b & -b
+        yield BIT_INDEX[low]
+        b ^= low
+
+
+##### shifts
+
+def spread(b): # b plus every neighbour of b
+    s = b | (b << 1) | (b >> 1)
+    s = s | (s << STRIDE) | (s >> STRIDE)
+    return s & FULL
+
+def count_planes(b):
+    # Bit-sliced neighbour count: the count for tile i is bit i of c0 + 2*c1 + 4*c2 + 8*c3.
+    # Each of the 8 shifted copies of b is added with a ripple carry across the planes.
+    c0 = c1 = c2 = c3 = 0
+    up = b >> STRIDE
+    down = b << STRIDE
+
+    for v in (b << 1, b >> 1, up, down, up << 1, up >> 1, down << 1, down >> 1):
+        v &= FULL
+        carry = c0 & v
+        c0 ^= v
+        carry2 = c1 & carry
+        c1 ^= carry
+        c3 |= c2 & carry2
+        c2 ^= carry2
+
+    return c0, c1, c2, c3
+
+
+##### Count neighbouring mines: returns (mask of safe tiles with 0, list of numbers by bit index)
+
+def compute_numbers(mines):
+    c0, c1, c2, c3 = count_planes(mines)
+    safe = FULL & ~mines
+    nums = [0] * len(NMASK)
+
+    for weight, plane in ((1, c0), (2, c1), (4, c2), (8, c3)):
+        for i in bits(plane & safe):
+            nums[i] += weight
+
+    zero = safe & ~(c0 | c1 | c2 | c3)
+    return zero, nums
+
+
+##### check if game is won / complete
+
+def check_win(mines, revealed):
+    return FULL & ~mines & ~revealed == 0
+
+
+##### flood-reveal through tiles with 0 neighbouring traps
+
+def flood(revealed, start, zero):
+    new = start & ~revealed
+    revealed |= new
+
+    while new:
+        grown = spread(new & zero) & ~revealed
+        revealed |= grown
+        new = grown
+
+    return revealed
+
+
+##### Place mines, avoiding the first click and its neighbours - engine.place_mines_avoiding on
+# a local layer, so it touches no shared state (safe to run on the second core). With
+# rng=engine.board_rng(seed, cx, cy) it lays out the same board as engine.new_board(cx, cy, seed).
+
+def place_mines(cx, cy, count, rng=random):
+    grid_w, grid_h = _grid
+    excluded = spread(bit(cx, cy))
+    mines = 0
+    placed = 0
+
+    while placed < count:
+        b = bit(rng.randrange(grid_w), rng.randrange(grid_h))
+
+        if b & excluded:
+            continue
+
+        if not mines & b:
+            if spread(b) & mines and rng.random() < 0.8: # too_close
+                continue
+            mines |= b
+            placed += 1
+
+    return mines
+
+
+#################### Solvers ####################
+# One function runs every tier: tier 1 = rules 1-3 (solver_basic), tier 2 adds rule 4
+# (solver_medium), tier 3 adds rule 5 (solver_advanced). As in engine.py, only the first click
+# floods; tiles with 0 found later by the rules are revealed but do not cascade.
+
+
+##### rules 2 & 3 for one numbered tile
+
+def _rules_2_3(i, n, revealed, flags):
+    nm = NMASK[i]
+    hidden = nm & ~revealed & ~flags
+    if not hidden:
+        return revealed, flags, False
+
+    flagged = engine.popcount(nm & flags)
+
+    # rule 2: if all hidden tiles are trapped, plant flags.
+    if n == flagged + engine.popcount(hidden):
+        return revealed, flags | hidden, True
+
+    # rule 3: if all hidden tiles are safe, reveal them.
+    if n == flagged:
+        return revealed | hidden, flags, True
+
+    return revealed, flags, False
+
+
+##### rule 4 for a pair of adjacent numbered tiles - the overlap rule of engine.apply_overlap_rule
+
+def _subset_rule(i1, n1, i2, n2, revealed, flags):
+    covered = ~revealed & ~flags
+    h1 = NMASK[i1] & covered
+    h2 = NMASK[i2] & covered
+
+    if not h1 or not h2:
+        return revealed, flags, False
+
+    only1 = h1 & ~h2
+    only2 = h2 & ~h1
+    if not only1 and not only2:
+        return revealed, flags, False
+
+    left = (n2 - engine.popcount(NMASK[i2] & flags)) - (n1 - engine.popcount(NMASK[i1] & flags))
+
+    if left == engine.popcount(only2): # only 2's tiles are mines, only 1's are safe
+        return revealed | only1, flags | only2, True
+
+    return revealed, flags, False
+
+
+##### rule 5 for one frontier group
+
+def _group_constraints(group, numbered, nums, revealed, flags): # (tiles, indexed constraints)
+    tiles = list(bits(group))
+    index = {}
+    for j in range(len(tiles)):
+        index[tiles[j]] = j
+
+    constraints = []
+    for i in bits(spread(group) & numbered & revealed):
+        nm = NMASK[i]
+        m = 0
+        for t in bits(nm & group):
+            m |= 1 << index[t]
+        constraints.append((m, nums[i] - engine.popcount(nm & flags)))
+
+    return tiles, constraints
+
+def _group_rule(group, numbered, nums, revealed, flags):
+    if engine.popcount(group) > engine.MAX_GROUP:
+        return revealed, flags, False
+
+    tiles, constraints = _group_constraints(group, numbered, nums, revealed, flags)
+    mine_idxs, safe_idxs = engine.deduce_group(len(tiles), constraints)
+    progress = False
+
+    for j in mine_idxs:
+        b = 1 << tiles[j]
+        if not flags & b:
+            flags |= b
+            progress = True
+
+    for j in safe_idxs:
+        b = 1 << tiles[j]
+        if not revealed & b:
+            revealed |= b
+            progress = True
+
+    return revealed, flags, progress
+
+
+##### rule 6 - the mine count, see probability.py
+
+def _count_rule(numbered, nums, revealed, flags, total_mines):
+    import probability
+
+    tiles = []
+    groups = []
+    for group in frontier_groups(numbered, revealed, flags):
+        if engine.popcount(group) > engine.MAX_GROUP:
+            return revealed, flags, False
+        group_tiles, constraints = _group_constraints(group, numbered, nums, revealed, flags)
+        tiles.append(group_tiles)
+        groups.append((len(group_tiles), constraints))
+
+    frontier = FULL & ~revealed & ~flags & spread(numbered & revealed)
+    interior = FULL & ~revealed & ~flags & ~frontier
+    counted = probability.count_assignments(groups, engine.popcount(interior),
+                                            total_mines - engine.popcount(flags))
+    if counted is None:
+        return revealed, flags, False
+
+    total, tile_mines, interior_mines = counted
+    certain = []
+    for g in range(len(tiles)):
+        for j in range(len(tiles[g])):
+            certain.append((1 << tiles[g][j], tile_mines[g][j]))
+    if interior_mines == 0 or interior_mines == total:
+        certain.append((interior, interior_mines))
+
+    progress = False
+    for b, m in certain:
+        if b and m == 0:
+            revealed |= b
+            progress = True
+        elif b and m == total:
+            flags |= b
+            progress = True
+
+    return revealed, flags, progress
+
+
+##### frontier groups: covered tiles linked through the numbered tiles they touch
+
+def frontier_groups(numbered, revealed, flags):
+    frontier = FULL & ~revealed & ~flags & spread(numbered & revealed)
+    groups = []
+
+    while frontier:
+        group = frontier & -frontier
+        while True:
+            grown = spread(spread(group) & numbered & revealed) & frontier
+            if grown == group:
+                break
+            group = grown
+        groups.append(group)
+        frontier &= ~group
+
+    return groups
+
+
+##### apply the rules of a tier until nothing changes
+
+def _close(numbered, nums, revealed, flags, tier, total_mines=0):
+    progress = True
+
+    while progress:
+        progress = False
+
+        # only numbered tiles with covered neighbours left can still tell anything
+        active = revealed & numbered & spread(FULL & ~revealed & ~flags)
+
+        # rules 2 & 3
+        for i in bits(active):
+            revealed, flags, made = _rules_2_3(i, nums[i], revealed, flags)
+            if made:
+                progress = True
+
+        # rule 4
+        if tier >= 2:
+            active = revealed & numbered & spread(FULL & ~revealed & ~flags)
+            for i1 in bits(active):
+                for i2 in bits(NMASK[i1] & active):
+                    revealed, flags, made = _subset_rule(i1, nums[i1], i2, nums[i2], revealed, flags)
+                    if made:
+                        progress = True
+
+        # rule 5 - groups are rebuilt after each deduction, as in engine.frontier_rounds
+        if tier >= 3 and not progress:
+            for group in frontier_groups(numbered, revealed, flags):
+                revealed, flags, made = _group_rule(group, numbered, nums, revealed, flags)
+                if made:
+                    progress = True
+                    break
+
+        # rule 6
+        if tier >= 3 and not progress and engine.COUNT_RULE:
+            revealed, flags, progress = _count_rule(numbered, nums, revealed, flags, total_mines)
+
+    return revealed, flags
+
+
+##### the solver
+
+def solve(mines, start_x, start_y, tier, zero=None, nums=None):
+    if zero is None:
+        zero, nums = compute_numbers(mines)
+
+    start = bit(start_x, start_y)
+    if mines & start:
+        return False
+
+    numbered = FULL & ~mines & ~zero
+    revealed = flood(0, start, zero) # rule 1
+    revealed, flags = _close(numbered, nums, revealed, 0, tier, engine.popcount(mines))
+
+    return check_win(mines, revealed)
+
+def solver_basic(mines, start_x, start_y):
+    return solve(mines, start_x, start_y, 1)
+
+def solver_medium(mines, start_x, start_y):
+    return solve(mines, start_x, start_y, 2)
+
+def solver_advanced(mines, start_x, start_y):
+    return solve(mines, start_x, start_y, 3)
+
+
+##### tiered solver, as engine.solve_tier: each tier carries on from where the one before stopped
+
+def solve_tier(mines, start_x, start_y, hardest="difficult", zero=None, nums=None):
+    return _solve_tier(mines, start_x, start_y, hardest, zero, nums)[0]
+
+def _solve_tier(mines, start_x, start_y, hardest, zero, nums): # (tier, revealed)
+    if zero is None:
+        zero, nums = compute_numbers(mines)
+
+    start = bit(start_x, start_y)
+    if mines & start:
+        return "unsolvable", 0
+
+    numbered = FULL & ~mines & ~zero
+    revealed = flood(0, start, zero) # rule 1
+    flags = 0
+
+    for tier in range(len(engine.TIERS)):
+        revealed, flags = _close(numbered, nums, revealed, flags, tier + 1, engine.popcount(mines))
+        if check_win(mines, revealed):
+            return engine.TIERS[tier], revealed
+        if engine.TIERS[tier] == hardest:
+            break
+
+    return "unsolvable", revealed
+
+
+##### Local search for a board of one tier - returns the mines, or None after steps moves
+# A rejected board is not thrown away: one or two of its mines move and it is solved again. Boards
+# score by how far their tier is from the one asked for, then by the safe tiles an unsolvable board
+# leaves covered, and a move is kept unless it scores worse. On an unsolvable board the mines that
+# move are taken next to those covered tiles, where the solvers got stuck. A move whose 3x3s miss
+# every tile the last solve revealed cannot change anything the solvers read, so its score is kept
+# without solving again. Moved mines skip the too_close() rejection.
+
+def search(mines, cx, cy, difficulty, steps, rng=random):
+    grid_w, grid_h = _grid
+    excluded = spread(bit(cx, cy))
+    target = engine.TIER_ORDER.index(difficulty)
+    count = engine.popcount(mines)
+
+    tier, revealed = _solve_tier(mines, cx, cy, "difficult", None, None)
+    tier = engine.TIER_ORDER.index(tier)
+    score = (abs(tier - target), engine.popcount(FULL & ~mines & ~revealed))
+
+    for _ in range(steps):
+        if tier == target:
+            break
+
+        candidates = list(bits(mines))
+        if tier == len(engine.TIERS): # unsolvable
+            stuck = [i for i in candidates if NMASK[i] & ~revealed & ~mines]
+            if stuck:
+                candidates = stuck
+
+        moved = mines
+        for _ in range(1 if rng.random() < 0.5 else 2):
+            # a mine still where it was: not one this step already moved, nor where it went
+            still = [i for i in candidates if moved >> i & 1]
+            if not still:
+                break
+            src = 1 << still[rng.randrange(len(still))]
+            while True:
+                dst = bit(rng.randrange(grid_w), rng.randrange(grid_h))
+                if not dst & (moved | excluded):
+                    break
+            moved = moved & ~src | dst
+
+        if not spread(moved ^ mines) & revealed: # nothing the last solve read has changed
+            mines = moved
+            continue
+
+        t, r = _solve_tier(moved, cx, cy, "difficult", None, None)
+        t = engine.TIER_ORDER.index(t)
+        s = (abs(t - target), engine.popcount(FULL & ~moved & ~r))
+        if s <= score:
+            mines, tier, revealed, score = moved, t, r, s
+
+    if tier != target or engine.popcount(mines) != count: # a move must never add or lose a mine
+        return None
+    return mines
+
+
+##### engine.board_matches, on the bitboard backend
+
+def board_matches(difficulty, cx, cy):
+    set_grid(engine.GRID_W, engine.GRID_H)
+    mines = from_grid(engine.mines)
+
+    return difficulty in engine.TIERS and solve_tier(mines, cx, cy, difficulty) == difficulty
@@ -0,0 +1,159 @@
+##### Pool of already-validated boards, kept on flash between games
+# One list of boards per (grid size, difficulty). The first click takes a board from the pool
+# instead of spinning through solver attempts, and the pool is topped up one attempt at a time
+# while the player is idle.
+#
+# A board is validated for one first click, but it is just as good for any other tile with 0 in
+# the same opening: the flood reveals exactly the same tiles. Other tiles with 0 (on the board or
+# its mirror images) only need one solve_tier check, which is still far cheaper than generating.
+#
+# The file records the engine.solver_id() the boards were validated under. A pool from another
+# solver (an older build, another MAX_GROUP or COUNT_RULE) is dropped rather than served, since
+# some of its boards may now be another tier.
+
+import json
+import random
+import engine
+
+
+POOL_FILE = "board_pool.json"
+POOL_SIZE = 6 # boards kept per (grid size, difficulty)
+
+_pool = None # {"solver": engine.solver_id(), "boards": {"large/difficult": [[first click x, first click y, mines as hex], ...]}}
+
+
+##### load / save
+
+def _load():
+    global _pool
+
+    if _pool is None:
+        try:
+            with open(POOL_FILE) as f:
+                _pool = json.load(f)
+        except (OSError, ValueError): # no pool yet, or a broken file
+            _pool = {}
+        _check_solver()
+
+    return _pool
+
+def _check_solver(): # on load, and before boards go in or out: the settings can change in between
+    global _pool
+
+    solver = engine.solver_id()
+    if not isinstance(_pool, dict) or _pool.get("solver") != solver: # also files from before it was recorded
+        _pool = {"solver": solver, "boards": {}}
+
+def _save():
+    try:
+        with open(POOL_FILE, "w") as f:
+            json.dump(_pool, f)
+    except OSError:
+        pass # read-only filesystem: the pool just lives in memory
+
+def _boards(dim, difficulty):
+    pool = _load()["boards"]
+    key = dim + "/" + difficulty
+    if key not in pool:
+        pool[key] = []
+    return pool[key]
+
+def count(dim, difficulty):
+    return len(_boards(dim, difficulty))
+
+def is_full(dim, difficulty):
+    return count(dim, difficulty) >= POOL_SIZE
+
+
+##### mine grid <-> hex string, bit y * GRID_W + x
+
+def encode(mines):
+    m = 0
+    for y in range(engine.GRID_H):
+        for x in range(engine.GRID_W):
+            if mines[y][x]:
+                m |= 1 << (y * engine.GRID_W + x)
+    return "%x" % m
+
+def decode(text):
+    m = int(text, 16)
+    return [[bool(m >> (y * engine.GRID_W + x) & 1) for x in range(engine.GRID_W)] for y in range(engine.GRID_H)]
+
+
+##### the board and its mirror images, each with the matching first click
+
+def _variants(mines, sx, sy):
+    w = engine.GRID_W
+    h = engine.GRID_H
+
+    yield mines, sx, sy
+    yield [row[::-1] for row in mines], w - 1 - sx, sy
+    yield mines[::-1], sx, h - 1 - sy
+    yield [row[::-1] for row in mines[::-1]], w - 1 - sx, h - 1 - sy
+
+
+##### set the engine board from the pool for a first click at (cx, cy). Returns True if it did.
+# The engine grid must already be set to dim.
+
+def take(dim, difficulty, cx, cy):
+    _load()
+    _check_solver()
+    boards = _boards(dim, difficulty)
+    s_revealed = [[False for _ in range(engine.GRID_W)] for _ in range(engine.GRID_H)]
+
+    for i in range(len(boards)):
+        sx, sy, text = boards[i]
+
+        for mines, vx, vy in _variants(decode(text), sx, sy):
+            engine.mines = mines
+            engine.compute_numbers()
+            if mines[cy][cx] or engine.numbers[cy][cx] != 0:
+                continue
+
+            # (cx, cy) is a 0: in the same opening as the variant's own first click, it reveals the
+            # same tiles, so the tier it was validated for still holds
+            for row in s_revealed:
+                for x in range(len(row)):
+                    row[x] = False
+            engine.flood_from(vx, vy, s_revealed)
+
+            if s_revealed[cy][cx] or engine.solve_tier(cx, cy, difficulty) == difficulty:
+                boards.pop(i)
+                _save()
+                engine.seed = None # not from generate_board, so no seed gives it again
+                return True
+
+    return False
+
+
+##### add a board validated for a first click at (sx, sy)
+
+def add(dim, difficulty, sx, sy, mines):
+    _load()
+    _check_solver()
+    boards = _boards(dim, difficulty)
+    if len(boards) >= POOL_SIZE:
+        return False
+
+    boards.append([sx, sy, encode(mines)])
+    _save()
+    return True
+
+
+##### one generation attempt for the pool. Returns True if a board was added.
+# The live board (engine.mines / engine.numbers) is left as it was, so this can run mid-game.
+
+def refill_step(dim, difficulty):
+    if is_full(dim, difficulty):
+        return False
+
+    saved = engine.mines, engine.numbers
+    engine.numbers = [[0 for _ in range(engine.GRID_W)] for _ in range(engine.GRID_H)]
+
+    sx = random.randrange(engine.GRID_W)
+    sy = random.randrange(engine.GRID_H)
+    engine.new_board(sx, sy)
+    added = engine.board_matches(difficulty, sx, sy) and add(dim, difficulty, sx, sy, engine.mines)
+
+    engine.mines, engine.numbers = saved
+    return added
@@ -0,0 +1,221 @@
+##### Binary board bank: fixed-size records behind a fixed-width index
+#
+# File layout (little endian):
+#   header   "MSWB", version u8, sections u8, record size u16, index entries u32, records offset u32,
+#            engine.solver_id() the boards were validated under, zero-padded to 16 bytes
+#   sections one per grid size: GRID_W u8, GRID_H u8, MINES u16, first index entry u32
+#   index    one entry per (grid size, difficulty, first-click cell): first record u32, count u32
+#            entry = section first entry + tier * GRID_W * GRID_H + y * GRID_W + x
+#   records  GRID_W u8, GRID_H u8, tier u8, pad u8, first click y * GRID_W + x u16,
+#            mines bit y * GRID_W + x packed into bytes, zero-padded to the record size
+#
+# The large grid's mine layer is 130 bits = 17 bytes, so a large record is 23 bytes. A reader finds
+# any board with two small reads (index entry, then record) and never loads or parses the rest, so
+# a file of millions of boards can be mmap'd on a PC or read with seek() on the Tufty. take() only
+# serves boards from a bank validated under the running solver_id(), like board_pool.py.
+#
+#   python board_store.py pack bank.txt boards.msb    (bank_builder.py text output -> binary)
+#   python board_store.py info boards.msb
+
+import struct
+import random
+import engine
+
+try:
+    import mmap
+except ImportError: # MicroPython: plain seek / read
+    mmap = None
+
+
+MAGIC = b"MSWB"
+VERSION = 2
+HEADER = "<4sBBHII16s"
+SECTION = "<BBHI"
+ENTRY = "<II"
+RECORD = "<BBBBH"
+HEADER_SIZE = struct.calcsize(HEADER)
+SECTION_SIZE = struct.calcsize(SECTION)
+ENTRY_SIZE = struct.calcsize(ENTRY)
+RECORD_HEADER_SIZE = struct.calcsize(RECORD)
+
+
+def mine_bytes(grid_w, grid_h):
+    return (grid_w * grid_h + 7) // 8
+
+
+##### writer - boards are (GRID_W, GRID_H, MINES, tier, first x, first y, mines int), validated under
+# the running engine.solver_id(). No boards is an empty bank, which take() never serves from.
+
+def write(path, boards):
+    sizes = []
+    for b in boards:
+        if b[:3] not in sizes:
+            sizes.append(b[:3])
+    sizes.sort()
+
+    first_entry = {}
+    entries = 0
+    for grid_w, grid_h, n_mines in sizes:
+        first_entry[(grid_w, grid_h)] = entries
+        entries += len(engine.TIERS) * grid_w * grid_h
+
+    record_size = RECORD_HEADER_SIZE
+    if sizes:
+        record_size += max(mine_bytes(s[0], s[1]) for s in sizes)
+
+    def slot(b):
+        grid_w, grid_h, _, tier, x, y, _ = b
+        return first_entry[(grid_w, grid_h)] + tier * grid_w * grid_h + y * grid_w + x
+
+    boards = sorted(boards, key=slot)
+    counts = [0] * entries
+    for b in boards:
+        counts[slot(b)] += 1
+
+    records_offset = HEADER_SIZE + len(sizes) * SECTION_SIZE + entries * ENTRY_SIZE
+
+    with open(path, "wb") as f:
+        f.write(struct.pack(HEADER, MAGIC, VERSION, len(sizes), record_size, entries, records_offset,
+                            engine.solver_id().encode()))
+        for grid_w, grid_h, n_mines in sizes:
+            f.write(struct.pack(SECTION, grid_w, grid_h, n_mines, first_entry[(grid_w, grid_h)]))
+
+        first = 0
+        for c in counts:
+            f.write(struct.pack(ENTRY, first, c))
+            first += c
+
+        for grid_w, grid_h, _, tier, x, y, mines in boards:
+            record = struct.pack(RECORD, grid_w, grid_h, tier, 0, y * grid_w + x)
+            record += mines.to_bytes(mine_bytes(grid_w, grid_h), "little")
+            f.write(record + bytes(record_size - len(record)))
+
+
+##### reader
+
+class BoardStore:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = None
+        if mmap is not None:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_sections, self.record_size, self.entries, self.records_offset, solver = \
+            struct.unpack(HEADER, self._read(0, HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a board bank: " + path)
+        self.solver = solver.decode().rstrip("\0")
+
+        self.sections = {}
+        for i in range(n_sections):
+            grid_w, grid_h, n_mines, first = struct.unpack(SECTION, self._read(HEADER_SIZE + i * SECTION_SIZE, SECTION_SIZE))
+            self.sections[(grid_w, grid_h)] = (n_mines, first)
+
+        self.index_offset = HEADER_SIZE + n_sections * SECTION_SIZE
+
+    def _read(self, offset, size):
+        if self.map is not None:
+            return self.map[offset:offset + size]
+        self.file.seek(offset)
+        return self.file.read(size)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def _entry(self, grid_w, grid_h, tier, x, y):
+        if (grid_w, grid_h) not in self.sections:
+            return 0, 0
+        slot = self.sections[(grid_w, grid_h)][1] + tier * grid_w * grid_h + y * grid_w + x
+        return struct.unpack(ENTRY, self._read(self.index_offset + slot * ENTRY_SIZE, ENTRY_SIZE))
+
+    def count(self, grid_w, grid_h, tier, x, y):
+        return self._entry(grid_w, grid_h, tier, x, y)[1]
+
+    def get(self, grid_w, grid_h, tier, x, y, k): # k-th board for this configuration, as a mines int
+        first, count = self._entry(grid_w, grid_h, tier, x, y)
+        if not 0 <= k < count:
+            raise IndexError(k)
+
+        record = self._read(self.records_offset + (first + k) * self.record_size, self.record_size)
+        return int.from_bytes(record[RECORD_HEADER_SIZE:RECORD_HEADER_SIZE + mine_bytes(grid_w, grid_h)], "little")
+
+    def random_board(self, grid_w, grid_h, tier, x, y): # None if there is none
+        count = self.count(grid_w, grid_h, tier, x, y)
+        if not count:
+            return None
+        return self.get(grid_w, grid_h, tier, x, y, random.randrange(count))
+
+    def __iter__(self): # every board, as written by write()
+        for k in range(self._total()):
+            record = self._read(self.records_offset + k * self.record_size, self.record_size)
+            grid_w, grid_h, tier, _, cell = struct.unpack(RECORD, record[:RECORD_HEADER_SIZE])
+            mines = int.from_bytes(record[RECORD_HEADER_SIZE:RECORD_HEADER_SIZE + mine_bytes(grid_w, grid_h)], "little")
+            n_mines = self.sections[(grid_w, grid_h)][0]
+            yield grid_w, grid_h, n_mines, tier, cell % grid_w, cell // grid_w, mines
+
+    def _total(self):
+        if not self.entries:
+            return 0
+        first, count = struct.unpack(ENTRY, self._read(self.index_offset + (self.entries - 1) * ENTRY_SIZE, ENTRY_SIZE))
+        return first + count
+
+
+##### set the engine board from a bank file for a first click at (cx, cy). Returns True if it did.
+
+def take(path, difficulty, cx, cy):
+    try:
+        store = BoardStore(path)
+    except (OSError, ValueError): # no bank on this device
+        return False
+
+    try:
+        if store.solver != engine.solver_id(): # some of its boards may now be another tier
+            return False
+        mines = store.random_board(engine.GRID_W, engine.GRID_H, engine.TIERS.index(difficulty), cx, cy)
+    finally:
+        store.close()
+
+    if mines is None:
+        return False
+
+    engine.mines = [[bool(mines >> (y * engine.GRID_W + x) & 1) for x in range(engine.GRID_W)]
+                    for y in range(engine.GRID_H)]
+    engine.compute_numbers()
+    engine.seed = None # not from generate_board, so no seed gives it again
+    return True
+
+
+##### bank_builder.py text lines -> boards for write()
+
+def read_text(path):
+    boards = []
+    with open(path) as f:
+        for line in f:
+            dim, difficulty, x, y, _, mines = line.split()
+            grid_w, grid_h, n_mines = engine.GRID_SIZES[dim]
+            boards.append((grid_w, grid_h, n_mines, engine.TIERS.index(difficulty), int(x), int(y), int(mines, 16)))
+    return boards
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 4 and sys.argv[1] == "pack":
+        boards = read_text(sys.argv[2])
+        write(sys.argv[3], boards)
+        print(f"{len(boards)} boards -> {sys.argv[3]}")
+
+    elif len(sys.argv) == 3 and sys.argv[1] == "info":
+        store = BoardStore(sys.argv[2])
+        print(f"solver {store.solver}, record size {store.record_size} bytes, {store.entries} index entries, "
+              f"{store._total()} boards")
+        for (grid_w, grid_h), (n_mines, first) in sorted(store.sections.items()):
+            for tier in range(len(engine.TIERS)):
+                total = sum(store.count(grid_w, grid_h, tier, x, y) for y in range(grid_h) for x in range(grid_w))
+                print(f"  {grid_w}x{grid_h} {n_mines} mines {engine.TIERS[tier]:9} {total} boards")
+        store.close()
+
+    else:
+        print("usage: python board_store.py pack bank.txt boards.msb | info boards.msb")
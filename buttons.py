@@ -0,0 +1,137 @@
+##### Button events from pin interrupts
+# Every press and release is timestamped in the pin IRQ and queued in a fixed-size ring buffer, so
+# the main loop gets them in order and with their real times however long its frame took, and can
+# sleep (wait()) until one arrives. A long press is timed from the press edge to the release edge,
+# not from whenever the loop got round to looking at the button.
+#
+# Without IRQs (the stand-ins in headless.py) poll mode reads the pimoroni Buttons once per
+# update() and turns their levels into the same events, timed to the frame like before (and
+# debounced by the frame time, like before).
+
+import time
+import machine
+
+if not hasattr(time, "ticks_ms"): # CPython
+    from headless import clock as time
+
+
+LEFT = 0
+RIGHT = 1
+UP = 2
+DOWN = 3
+REVEAL = 4
+
+DEBOUNCE_MS = 20 # edges this soon after the last one on the same button are contact bounce
+QUEUE_SIZE = 32  # events waiting for the main loop; one more is dropped (and counted)
+
+_pins = []     # machine.Pin per button id (IRQ mode)
+_polled = []   # pimoroni Button per button id (poll mode)
+_level = []    # last level queued per button, True = pressed
+_last = []     # ticks_ms of the last edge queued per button
+
+# the ring buffer: the IRQ writes at _head, the main loop reads at _tail
+_event_button = [0] * QUEUE_SIZE
+_event_pressed = [False] * QUEUE_SIZE
+_event_time = [0] * QUEUE_SIZE
+_head = 0
+_tail = 0
+dropped = 0
+
+
+##### set up: pins are the GPIO numbers in button id order, buttons the matching pimoroni Buttons
+
+def setup(pins, buttons, irq=True):
+    global _pins, _polled, _level, _last
+
+    _level = [False] * len(pins)
+    _last = [time.ticks_ms()] * len(pins)
+    _pins = []
+    _polled = []
+    clear()
+
+    if not irq:
+        _polled = list(buttons)
+        return
+
+    for i in range(len(pins)):
+        pin = machine.Pin(pins[i], machine.Pin.IN, machine.Pin.PULL_DOWN) # pressed = high
+        pin.irq(_handler(i), machine.Pin.IRQ_RISING | machine.Pin.IRQ_FALLING)
+        _pins.append(pin)
+
+def _handler(i): # one per pin, made once at setup so the IRQ itself doesn't allocate
+    def edge(pin):
+        now = time.ticks_ms()
+        if time.ticks_diff(now, _last[i]) >= DEBOUNCE_MS:
+            _edge(i, pin.value() == 1, now)
+    return edge
+
+def _edge(i, level, now):
+    global _head, dropped
+
+    if level == _level[i]:
+        return
+
+    _level[i] = level
+    _last[i] = now
+    head = (_head + 1) % QUEUE_SIZE
+    if head == _tail:
+        dropped += 1
+        return
+
+    _event_button[_head] = i
+    _event_pressed[_head] = level
+    _event_time[_head] = now
+    _head = head
+
+
+##### main loop side
+
+def update(): # once per frame, before get()
+    now = time.ticks_ms()
+
+    if _polled:
+        for i in range(len(_polled)):
+            _edge(i, bool(_polled[i].is_pressed), now)
+        return
+
+    # an edge inside the debounce time of the one before (a very short tap) was skipped; queue it
+    # once the pin has settled, so the level seen by the loop always ends up right
+    for i in range(len(_pins)):
+        if time.ticks_diff(now, _last[i]) >= DEBOUNCE_MS:
+            level = _pins[i].value() == 1
+            if level != _level[i]:
+                irq_state = machine.disable_irq()
+                _edge(i, level, now)
+                machine.enable_irq(irq_state)
+
+def get(): # (button id, pressed, ticks_ms) for the oldest event, or None
+    global _tail
+
+    if _tail == _head:
+        return None
+
+    event = (_event_button[_tail], _event_pressed[_tail], _event_time[_tail])
+    _tail = (_tail + 1) % QUEUE_SIZE
+    return event
+
+def pending():
+    return _tail != _head
+
+def held(i):
+    return _level[i]
+
+def clear(): # forget presses meant for something else (a menu, the wait screen)
+    global _tail
+    _tail = _head
+
+
+##### sleep until there is an event or ms have passed
+
+def wait(ms):
+    if ms <= 0 or _polled: # poll mode has nothing that could wake it up
+        return
+
+    deadline = time.ticks_add(time.ticks_ms(), ms)
+    while _tail == _head and time.ticks_diff(deadline, time.ticks_ms()) > 0:
+        update()
+        machine.idle() # until the next interrupt: a button, or the 1 ms tick
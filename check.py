@@ -0,0 +1,299 @@
+##### Equivalence checks for the solvers - python check.py [boards]
+# Each faster or incremental piece of the solvers is checked against a slower, simpler one that
+# says the same thing, on seeded boards, so a later change can't quietly break one of them:
+#   - bitboard numbers and solvers against the list ones (bitboard.py)
+#   - solve_tier against solver_basic, solver_medium and solver_advanced run one after the other
+#   - FrontierTracker against build_frontier_groups at every rule 5 round
+#   - search_group against trying every mask, deduce_steps against deduce_group
+#   - probabilities against counting every mine layout, on a tiny grid
+#   - hints never marking a mine safe or a safe tile trapped
+#   - local search (SEARCH_STEPS) boards: the grid's mine count, and the tier they were accepted for
+# Prints one line per check and exits with 1 if any of them found a difference.
+
+import random
+import engine
+import bitboard
+import probability
+import hints
+
+
+##### the list solvers, one after the other: what solve_tier must agree with
+
+def tier_by_solvers(cx, cy):
+    if engine.solver_basic(cx, cy):
+        return "easy"
+    if engine.solver_medium(cx, cy):
+        return "medium"
+    if engine.solver_advanced(cx, cy):
+        return "difficult"
+    return "unsolvable"
+
+def check_backends(boards, seed=1):
+    bad = 0
+    checked = 0
+
+    for count_rule in (False, True):
+        engine.COUNT_RULE = count_rule
+        for dim in ("small", "medium", "large"):
+            engine.set_grid(dim)
+            bitboard.set_grid(engine.GRID_W, engine.GRID_H)
+            random.seed(seed)
+
+            for s in range(boards):
+                cx = random.randrange(engine.GRID_W)
+                cy = random.randrange(engine.GRID_H)
+                engine.new_board(cx, cy, seed + s)
+                mines = bitboard.from_grid(engine.mines)
+                checked += 1
+
+                _, nums = bitboard.compute_numbers(mines)
+                for y in range(engine.GRID_H):
+                    for x in range(engine.GRID_W):
+                        if not engine.mines[y][x] and nums[y * bitboard.STRIDE + x] != engine.numbers[y][x]:
+                            bad += 1
+
+                if not count_rule: # bitboard.solve has no rule 6, like the list solvers
+                    for tier, solver in ((1, engine.solver_basic), (2, engine.solver_medium), (3, engine.solver_advanced)):
+                        if solver(cx, cy) != bitboard.solve(mines, cx, cy, tier):
+                            bad += 1
+
+                tier = engine.solve_tier(cx, cy)
+                if tier != bitboard.solve_tier(mines, cx, cy):
+                    bad += 1
+                if not count_rule and tier != tier_by_solvers(cx, cy):
+                    bad += 1
+                for hardest in engine.TIERS: # stopping early only ever turns the answer into unsolvable
+                    expected = tier if engine.TIER_ORDER.index(tier) <= engine.TIERS.index(hardest) else "unsolvable"
+                    if engine.solve_tier(cx, cy, hardest) != expected:
+                        bad += 1
+
+    engine.COUNT_RULE = False
+    print(f"backends     {checked:6} boards  {bad} differences")
+    return bad
+
+
+##### FrontierTracker.groups() against build_frontier_groups, at every rule 5 round
+
+def check_tracker(boards, seed=1):
+    bad = [0]
+    rounds = [0]
+    groups = engine.FrontierTracker.groups
+
+    def checked(self):
+        found = groups(self)
+        rounds[0] += 1
+        if sorted(sorted(g) for g in found) != sorted(sorted(g) for g in engine.build_frontier_groups(self.revealed, self.flags)):
+            bad[0] += 1
+        return found
+
+    engine.FrontierTracker.groups = checked
+    try:
+        for count_rule in (False, True):
+            engine.COUNT_RULE = count_rule
+            for dim in ("small", "medium", "large"):
+                engine.set_grid(dim)
+                for s in range(boards):
+                    cx = s % engine.GRID_W
+                    cy = s % engine.GRID_H
+                    engine.new_board(cx, cy, seed + s)
+                    engine.solve_tier(cx, cy)
+    finally:
+        engine.FrontierTracker.groups = groups
+        engine.COUNT_RULE = False
+
+    print(f"tracker      {rounds[0]:6} rounds  {bad[0]} differences")
+    return bad[0]
+
+
+##### search_group against every mask, deduce_steps (in slices) against deduce_group
+
+def check_search(systems, seed=1):
+    random.seed(seed)
+    bad = 0
+    cache_size = engine.GROUP_CACHE_SIZE
+    engine.GROUP_CACHE_SIZE = 0 # or deduce_steps would only find deduce_group's answer again
+
+    for _ in range(systems):
+        size = random.randint(1, 12)
+        constraints = []
+        for _ in range(random.randint(1, 6)):
+            m = 0
+            for i in range(size):
+                if random.random() < 0.4:
+                    m |= 1 << i
+            if m:
+                constraints.append((m, random.randint(0, engine.popcount(m))))
+
+        every = [mask for mask in range(1 << size)
+                 if all(engine.popcount(mask & m) == n for m, n in constraints)]
+        found = engine.enumerate_group(size, constraints)
+        if sorted(found) != every:
+            bad += 1
+
+        deduced = engine.deduce_group(size, constraints)
+        if engine.finish(engine.deduce_steps(size, constraints, 1)) != deduced:
+            bad += 1
+        if every and deduced != engine.deduce_from_masks(every, size):
+            bad += 1
+
+    engine.GROUP_CACHE_SIZE = cache_size
+    print(f"search       {systems:6} systems {bad} differences")
+    return bad
+
+
+##### probabilities() against counting every mine layout, on a 5x4 grid with 5 mines
+# The covered tiles are random, not just what a flood would leave, so open 0s and stray flags
+# come up as well.
+
+def choose(n, k, start=0, mask=0): # every n-bit mask with k bits set
+    if k == 0:
+        yield mask
+        return
+    for i in range(start, n - k + 1):
+        yield from choose(n, k - 1, i + 1, mask | 1 << i)
+
+def check_probabilities(states, seed=1):
+    engine.GRID_SIZES["check"] = (5, 4, 5)
+    engine.set_grid("check")
+    random.seed(seed)
+    w, h = engine.GRID_W, engine.GRID_H
+    bad = 0
+
+    try:
+        for s in range(states):
+            engine.new_board(0, 0, seed + s)
+            safe = [(x, y) for y in range(h) for x in range(w) if not engine.mines[y][x]]
+            revealed = [[False] * w for _ in range(h)]
+            flags = [[False] * w for _ in range(h)]
+            for x, y in random.sample(safe, random.randint(1, len(safe) - 1)):
+                revealed[y][x] = True
+            for y in range(h):
+                for x in range(w):
+                    if engine.mines[y][x] and random.random() < 0.3:
+                        flags[y][x] = True
+
+            covered = [(x, y) for y in range(h) for x in range(w) if not revealed[y][x] and not flags[y][x]]
+            left = probability.mines_left(flags)
+            layouts = 0
+            on_tile = [0] * len(covered)
+            for m in choose(len(covered), left):
+                placed = set(covered[i] for i in range(len(covered)) if m >> i & 1)
+                fits = True
+                for y in range(h):
+                    for x in range(w):
+                        if revealed[y][x]:
+                            around = 0
+                            for t in engine.NEIGHBOURS[y][x]:
+                                if flags[t[1]][t[0]] or t in placed:
+                                    around += 1
+                            if around != engine.numbers[y][x]:
+                                fits = False
+                if fits:
+                    layouts += 1
+                    for i in range(len(covered)):
+                        if m >> i & 1:
+                            on_tile[i] += 1
+
+            grid = probability.probabilities(revealed, flags)
+            if grid is None:
+                bad += 1
+                continue
+            for i in range(len(covered)):
+                x, y = covered[i]
+                if abs(grid[y][x] - on_tile[i] / layouts) > 1e-9:
+                    bad += 1
+                    break
+    finally:
+        del engine.GRID_SIZES["check"]
+
+    print(f"probability  {states:6} states  {bad} differences")
+    return bad
+
+
+##### hints: every mark has to be right, on games played with random moves
+
+def check_hints(games, seed=1):
+    random.seed(seed)
+    bad = 0
+    marks = 0
+
+    for dim in ("small", "medium", "large"):
+        engine.set_grid(dim)
+        for g in range(games):
+            cx = random.randrange(engine.GRID_W)
+            cy = random.randrange(engine.GRID_H)
+            engine.new_board(cx, cy, seed + g)
+            engine.auto_reveal(cx, cy)
+            hints.reset()
+
+            for _ in range(20):
+                hints.restart(engine.revealed)
+                while hints.busy():
+                    hints.step(1000)
+
+                covered = []
+                for y in range(engine.GRID_H):
+                    for x in range(engine.GRID_W):
+                        bit = engine.TILE_BITS[y][x]
+                        if hints.safe_mask & bit and engine.mines[y][x]:
+                            bad += 1
+                        if hints.mine_mask & bit and not engine.mines[y][x]:
+                            bad += 1
+                        if not engine.revealed[y][x]:
+                            marks += bool((hints.safe_mask | hints.mine_mask) & bit)
+                            if not engine.mines[y][x]:
+                                covered.append((x, y))
+                if not covered:
+                    break
+
+                x, y = random.choice(covered)
+                engine.auto_reveal(x, y)
+                if random.random() < 0.1: # a trap the player fell into
+                    x, y = random.choice([(x, y) for y in range(engine.GRID_H) for x in range(engine.GRID_W) if engine.mines[y][x]])
+                    engine.revealed[y][x] = True
+
+    print(f"hints        {marks:6} marks   {bad} wrong")
+    return bad
+
+
+##### local search: a moved mine must never add or lose one, and the board is the tier asked for
+
+def check_local_search(boards, seed=1):
+    bad = 0
+    checked = 0
+    engine.SEARCH_STEPS = 50
+
+    try:
+        for dim in ("small", "medium", "large"):
+            engine.set_grid(dim)
+            cx = engine.GRID_W // 2
+            cy = engine.GRID_H // 2
+            for s in range(boards):
+                for difficulty in engine.TIERS:
+                    engine.generate_board(difficulty, cx, cy, first_seed=seed + s * 1000)
+                    checked += 1
+                    if sum(sum(row) for row in engine.mines) != engine.MINES:
+                        bad += 1
+                    elif engine.solve_tier(cx, cy) != difficulty:
+                        bad += 1
+    finally:
+        engine.SEARCH_STEPS = 0
+
+    print(f"local search {checked:6} boards  {bad} wrong")
+    return bad
+
+
+def run(boards=100):
+    bad = check_backends(boards)
+    bad += check_tracker(boards)
+    bad += check_search(boards * 5)
+    bad += check_probabilities(boards * 2)
+    bad += check_hints(boards // 2)
+    bad += check_local_search(boards // 10)
+    return bad
+
+
+if __name__ == "__main__":
+    import sys
+    if run(*[int(a) for a in sys.argv[1:2]]):
+        sys.exit(1)
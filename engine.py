@@ -0,0 +1,1220 @@
+##### Headless game engine
+# Board state, mine placement, solvers, flood reveal and win check. Nothing in here touches the
+# display or the buttons, so the same code runs on the Tufty and under CPython (see bench.py).
+
+import random
+
+
+##### Grid sizes: (GRID_W, GRID_H, MINES)
+
+GRID_SIZES = {
+    "small": (8, 8, 10),
+    "medium": (10, 8, 15),
+    "large": (13, 10, 20),
+}
+
+GRID_W = 0
+GRID_H = 0
+MINES = 0
+MAX_GROUP = 40 # frontier group size limit for rule 5 - a guard against blow-ups, see search_group
+BITBOARD = False # run the generation solvers on the bitboard backend (bitboard.py)
+seed = None # seed of the board set by generate_board, None if it came from somewhere else
+COUNT_RULE = False # rule 6 in the advanced solver: deductions that need the total mine count
+SEARCH_STEPS = 0 # mine moves tried on a rejected board before a fresh one is laid out (0 = off)
+METRICS = False # rule counters in propagate, set by metrics.enable() (metrics.py)
+SOLVER_VERSION = 1 # bump when a solver change moves some boards to another tier (see solver_id)
+
+mines = []
+numbers = []
+revealed = []
+flags = []
+
+NEIGHBOURS = () # NEIGHBOURS[y][x] = ((nx, ny), ...) around (x, y), see build_neighbours
+TILE_BITS = () # TILE_BITS[y][x] = 1 << (y * GRID_W + x), for the rule 4 masks
+_neighbour_tables = {} # (GRID_W, GRID_H) -> NEIGHBOURS
+
+
+##### Choose a grid size and start with an empty board
+
+def set_grid(dim):
+    global GRID_W, GRID_H, MINES, mines, numbers, revealed, flags, NEIGHBOURS, TILE_BITS
+
+    GRID_W, GRID_H, MINES = GRID_SIZES[dim]
+    NEIGHBOURS = build_neighbours(GRID_W, GRID_H)
+    TILE_BITS = tuple(tuple(1 << (y * GRID_W + x) for x in range(GRID_W)) for y in range(GRID_H))
+    revealed = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+    mines = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+    numbers = [[0 for _ in range(GRID_W)] for _ in range(GRID_H)]
+    flags = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+
+
+
+
+##### what decides which tier a board needs: the solver code and the settings that change it.
+# Boards validated under another solver_id() may not be the tier they were saved as.
+
+def solver_id():
+    return f"{SOLVER_VERSION}/{MAX_GROUP}/{int(COUNT_RULE)}"
+
+
+#################### Mines functions ####################
+
+
+##### Seeded random numbers - xorshift32, so a seed gives the same board in CPython and MicroPython
+# (the random module differs between the two). Has the two calls mine placement needs.
+
+class Rng:
+    def __init__(self, state):
+        self.state = (state & 0xFFFFFFFF) or 0x9E3779B9 # xorshift gets stuck on 0
+
+    def next(self):
+        s = self.state
+        s ^= (s << 13) & 0xFFFFFFFF
+        s ^= s >> 17
+        s ^= (s << 5) & 0xFFFFFFFF
+        self.state = s
+        return s
+
+    def randrange(self, n):
+        return self.next() % n
+
+    def random(self):
+        return self.next() / 4294967296
+
+
+##### Random numbers for one board: a pure function of (seed, grid size, mine count, first click)
+
+def board_rng(seed, cx, cy):
+    state = 0
+    for v in (seed, GRID_W, GRID_H, MINES, cx, cy):
+        state = ((state ^ v) * 0x01000193 + 0x6B43A9B5) & 0xFFFFFFFF # FNV-style mix
+    rng = Rng(state)
+    for _ in range(4): # let the mixed state settle
+        rng.next()
+    return rng
+
+
+##### Place mines, avoiding first revealed tiles and its neighboors
+
+def place_mines_avoiding(cx, cy, rng=random):
+    placed = 0
+    while placed < MINES:
+        x = rng.randrange(GRID_W)
+        y = rng.randrange(GRID_H)
+
+        # Skip first revealed tile and its neighbours.
+        if abs(x - cx) <= 1 and abs(y - cy) <= 1:
+            continue
+
+        if not mines[y][x]:
+            if too_close(x, y) and rng.random() < 0.8:
+                continue
+            mines[y][x] = True
+            placed += 1
+            
+def too_close(x, y):
+    # This avoids too many mines being too close to each other. But it makes the task harder for the solvers.
+    # Use with cuation: (-1, 0, 1) is fine, (-2, -1, 0, 1, 2) is too much (and NEIGHBOURS only covers the first).
+    if mines[y][x]:
+        return True
+    for nx, ny in NEIGHBOURS[y][x]:
+        if mines[ny][nx]:
+            return True
+    return False
+
+
+##### Count neighbouring mines, add numbers to the grid
+
+def count_neighbours(cx, cy):
+    count = 0
+    for nx, ny in NEIGHBOURS[cy][cx]:
+        if mines[ny][nx]:
+            count += 1
+    return count
+
+def compute_numbers():
+    for y in range(GRID_H):
+        for x in range(GRID_W):
+            if not mines[y][x]:
+                numbers[y][x] = count_neighbours(x, y)
+
+
+
+
+#################### Solvers functions #################### 
+
+
+##### basic solver sub-function - coordinates of all tiles in neighbourood of (x,y)
+# Built once per grid size and kept: the solvers call this for every tile on every sweep, and
+# fresh lists each time were most of the garbage collected while "Making sure the game is solvable".
+# The (x, y) tuples are shared between neighbourhoods, so each one exists only once.
+
+def build_neighbours(grid_w, grid_h):
+    key = (grid_w, grid_h)
+
+    if key not in _neighbour_tables:
+        coords = [[(x, y) for x in range(grid_w)] for y in range(grid_h)]
+        table = []
+
+        for y in range(grid_h):
+            row = []
+            for x in range(grid_w):
+                neighbours = []
+                for dy in (-1, 0, 1):
+                    for dx in (-1, 0, 1):
+                        if dx == 0 and dy == 0:
+                            continue
+                        nx = x + dx
+                        ny = y + dy
+                        if 0 <= nx < grid_w and 0 <= ny < grid_h:
+                            neighbours.append(coords[ny][nx])
+                row.append(tuple(neighbours))
+            table.append(tuple(row))
+
+        _neighbour_tables[key] = tuple(table)
+
+    return _neighbour_tables[key]
+
+def get_neighbours(x, y):
+    return NEIGHBOURS[y][x]
+
+
+##### solver worklist - numbered tiles whose neighbourhood changed and must be checked again
+# Rather than sweeping the whole grid until a pass changes nothing, the solvers only re-check the
+# revealed numbered tiles around each tile they just revealed or flagged. The cost then follows the
+# number of deductions, not grid area times passes.
+
+def start_worklist(s_revealed):
+    queue = []
+    queued = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+
+    for y in range(GRID_H):
+        for x in range(GRID_W):
+            if s_revealed[y][x] and numbers[y][x] > 0:
+                queued[y][x] = True
+                queue.append((x, y))
+
+    return queue, queued
+
+def mark_dirty(x, y, s_revealed, queue, queued, frontier=None): # (x, y) was just revealed or flagged
+    if frontier is not None:
+        frontier.update(x, y)
+
+    if s_revealed[y][x] and numbers[y][x] > 0 and not queued[y][x]:
+        queued[y][x] = True
+        queue.append((x, y))
+
+    for nx, ny in NEIGHBOURS[y][x]:
+        if s_revealed[ny][nx] and numbers[ny][nx] > 0 and not queued[ny][nx]:
+            queued[ny][nx] = True
+            queue.append((nx, ny))
+
+
+##### solver propagation - rules 2 & 3, plus rule 4 when subset is True, until the worklist is empty
+
+def propagate(queue, queued, s_revealed, s_flags, subset, frontier=None):
+    progress = False
+
+    while queue:
+        x, y = queue.pop()
+        queued[y][x] = False
+
+        hidden = []
+        flagged = 0
+
+        for nx, ny in NEIGHBOURS[y][x]:
+            if s_flags[ny][nx]:
+                flagged += 1 # count flags already planted in neighbourhood
+            elif not s_revealed[ny][nx]:
+                hidden.append((nx, ny)) # all non-revealed, non-flagged tiles
+
+        if hidden:
+            # rule 2: if all hidden tiles are trapped, plant flags and carry on.
+            if numbers[y][x] == flagged + len(hidden):
+                for nx, ny in hidden:
+                    s_flags[ny][nx] = True
+                    mark_dirty(nx, ny, s_revealed, queue, queued, frontier)
+                progress = True
+                if METRICS:
+                    import metrics
+                    metrics.count("rule2")
+
+            # rule 3: if all hidden tiles are safe, reveal them and carry on.
+            # (tiles with 0 revealed here do not flood, as before: only the first click does)
+            elif numbers[y][x] == flagged:
+                for nx, ny in hidden:
+                    s_revealed[ny][nx] = True
+                    mark_dirty(nx, ny, s_revealed, queue, queued, frontier)
+                progress = True
+                if METRICS:
+                    import metrics
+                    metrics.count("rule3")
+
+        if not subset:
+            continue
+
+        # rule 4 - subset / overlap rule, both ways round with every numbered neighbour
+        h1, r1 = hidden_mask(x, y, s_revealed, s_flags)
+        for x2, y2 in NEIGHBOURS[y][x]:
+            if not h1:
+                break
+            if not s_revealed[y2][x2]:
+                continue
+            if numbers[y2][x2] == 0:
+                continue
+
+            h2, r2 = hidden_mask(x2, y2, s_revealed, s_flags)
+            if not h2:
+                continue
+
+            changed = (apply_overlap_rule(x, y, h1, r1, x2, y2, h2, r2, s_revealed, s_flags) or
+                       apply_overlap_rule(x2, y2, h2, r2, x, y, h1, r1, s_revealed, s_flags))
+            if changed:
+                progress = True
+                if METRICS:
+                    import metrics
+                    metrics.count("rule4")
+                for cx, cy in changed:
+                    mark_dirty(cx, cy, s_revealed, queue, queued, frontier)
+                h1, r1 = hidden_mask(x, y, s_revealed, s_flags)
+
+    return progress
+
+
+##### rule 1: flood-reveal of all the empty tiles connected to the first click
+
+def flood_from(start_x, start_y, s_revealed):
+    stack = [(start_x, start_y)] # coordinates of the first click
+
+    while stack:
+        x, y = stack.pop()
+        if s_revealed[y][x]:
+            continue
+        if mines[y][x]:
+            return False  # Just to be extra safe - should (must) never happen here.
+
+        s_revealed[y][x] = True
+
+        if numbers[y][x] == 0:
+            for nx, ny in NEIGHBOURS[y][x]:
+                if not s_revealed[ny][nx]:
+                    stack.append((nx, ny))
+
+    return True
+
+
+##### check if all safe tiles were revealed
+
+def all_safe_revealed(s_revealed):
+    for y in range(GRID_H):
+        for x in range(GRID_W):
+            if not mines[y][x] and not s_revealed[y][x]:
+                return False
+
+    return True
+
+
+##### Basic solver main
+
+def solver_basic(start_x, start_y): 
+    s_revealed = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+    s_flags = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+
+    # rule 1
+    if not flood_from(start_x, start_y, s_revealed):
+        return False
+
+    # rules 2 & 3
+    queue, queued = start_worklist(s_revealed)
+    propagate(queue, queued, s_revealed, s_flags, False)
+
+    return all_safe_revealed(s_revealed)
+
+
+##### medium solver sub-function - covered, unflagged neighbours of (x, y) as a mask of TILE_BITS,
+# and the mines among them still to find
+
+def hidden_mask(x, y, s_revealed, s_flags):
+    hidden = 0
+    flagged = 0
+
+    for nx, ny in NEIGHBOURS[y][x]:
+        if s_flags[ny][nx]:
+            flagged += 1
+        elif not s_revealed[ny][nx]:
+            hidden |= TILE_BITS[ny][nx]
+
+    return hidden, numbers[y][x] - flagged
+
+
+##### medium solver sub-function - overlap rule (rule 4) for numbered tiles 1 and 2. Returns the
+# tiles that changed. The mines in the overlap are at least r2 - |only 2| and at most r1, so when
+# r2 - r1 == |only 2|, the overlap holds all of r1: the tiles only 1 sees are safe and the tiles
+# only 2 sees are all mines. With 1's tiles a subset of 2's this is the old subset rule (called
+# the other way round for its "remaining tiles are safe" case); it also covers the 1-2 overlaps.
+
+def apply_overlap_rule(x1, y1, h1, r1, x2, y2, h2, r2, s_revealed, s_flags):
+    only1 = h1 & ~h2
+    only2 = h2 & ~h1
+
+    if not (only1 or only2) or r2 - r1 != popcount(only2):
+        return []
+
+    changed = []
+
+    for x, y in NEIGHBOURS[y2][x2]:
+        if only2 & TILE_BITS[y][x]:
+            s_flags[y][x] = True
+            changed.append((x, y))
+
+    for x, y in NEIGHBOURS[y1][x1]:
+        if only1 & TILE_BITS[y][x]:
+            s_revealed[y][x] = True
+            changed.append((x, y))
+
+    return changed
+
+
+##### medium solver sub-function - rule 4 for one ordered pair. Returns (progress, tiles that changed)
+
+def apply_subset_rule(x1, y1, x2, y2, s_revealed, s_flags):
+    if numbers[y1][x1] == 0 or numbers[y2][x2] == 0:
+        return False, []
+
+    h1, r1 = hidden_mask(x1, y1, s_revealed, s_flags)
+    h2, r2 = hidden_mask(x2, y2, s_revealed, s_flags)
+    if not h1 or not h2:
+        return False, []
+
+    changed = apply_overlap_rule(x1, y1, h1, r1, x2, y2, h2, r2, s_revealed, s_flags)
+    return bool(changed), changed
+
+
+##### medium solver main
+
+def solver_medium(start_x, start_y): 
+    s_revealed = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+    s_flags = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+
+    # rule 1
+    if not flood_from(start_x, start_y, s_revealed):
+        return False
+
+    # rules 2, 3 & 4
+    queue, queued = start_worklist(s_revealed)
+    propagate(queue, queued, s_revealed, s_flags, True)
+
+    return all_safe_revealed(s_revealed)
+
+
+##### advanced solver sub-function 1 - find if a tile is on the frontier 
+
+def is_frontier_tile(x, y, revealed, flags):
+    if revealed[y][x] or flags[y][x]:
+        return False
+
+    for nx, ny in NEIGHBOURS[y][x]:
+        if revealed[ny][nx] and numbers[ny][nx] > 0:
+            return True
+
+    return False
+# a frontier tile is: not revealed, not flagged, touches at least one revealed tile with > 0 number
+
+
+##### advanced solver sub-function 2 - arrange frontier tiles into sets
+
+def build_number_to_frontier_map(revealed, flags):
+    mapping = {}
+
+    for y in range(GRID_H):
+        for x in range(GRID_W):
+            if revealed[y][x] and numbers[y][x] > 0:
+                adj = set() # no duplicates, order not important
+                for nx, ny in NEIGHBOURS[y][x]:
+                    if is_frontier_tile(nx, ny, revealed, flags):
+                        adj.add((nx, ny))
+                if adj:
+                    mapping[(x, y)] = adj
+
+    return mapping
+    # mapping =
+    #{ (3, 4): {(2, 4), (3, 5)}, 
+    #  (5, 4): {(5, 5), (6, 5)...} ... }
+    # where (3,4) is a revealed tile with number > 0. (2,4) & (3,5) are two frontier tiles connected to (3,4)
+
+
+##### advanced solver sub-function 3 - re-arrange frontier tiles from the sets into frontier groups
+
+def build_frontier_groups(revealed, flags):
+    number_map = build_number_to_frontier_map(revealed, flags)
+
+    groups = [] # will be the final list of frontier groups
+    visited = set() # contains all frontier tiles already placed in a group
+    
+    for frontier_set in number_map.values(): # pick one set of frontier tiles
+        for tile in frontier_set: # pick one frontier tile from this set
+            if tile in visited: # if this tile is already assigned, move to next tile
+                continue
+
+            group = set() # start a new group - will later be appended to "groups"
+            stack = [tile]
+
+            while stack:
+                t = stack.pop()
+                if t in visited:
+                    continue
+
+                visited.add(t) # tile t will not be visited again
+                group.add(t) # tile t is assigned to this group
+
+                for adj in number_map.values(): # pick a second set of frontier tiles
+                    if t in adj: # if tile t is also present in this second set...
+                        for other in adj: # ... add the tiles from that second set to the stack
+                            if other not in visited:
+                                stack.append(other)
+
+            groups.append(group)
+
+    return groups
+
+
+##### advanced solver sub-function 3b - frontier tracker
+# build_frontier_groups starts from nothing each time, and for every tile it groups it scans every
+# number's set of frontier tiles. The tracker keeps the frontier groups in a union-find between
+# rule 5 rounds instead, and only works around tiles that change (mark_dirty tells it). Union-find
+# cannot split a group, so a group that loses a tile is rebuilt from its remaining tiles - the
+# rest of the board is not touched.
+
+class FrontierTracker:
+    def __init__(self, revealed, flags):
+        self.revealed = revealed
+        self.flags = flags
+        self.parent = {}     # frontier tile -> parent tile
+        self.members = {}    # root -> set of its frontier tiles
+        self.linked = set()  # revealed numbered tiles whose frontier tiles are joined
+        self.live = set()    # linked tiles that may still have covered neighbours (index_groups)
+        self.broken = set()  # roots of groups that lost a tile
+        self.gone = []       # tiles that left the frontier, still in parent until the rebuild
+
+        for y in range(GRID_H):
+            for x in range(GRID_W):
+                if revealed[y][x] and numbers[y][x] > 0:
+                    self.linked.add((x, y))
+                    self.live.add((x, y))
+                    self.link(x, y)
+
+    def find(self, t):
+        parent = self.parent
+        while parent[t] != t:
+            parent[t] = parent[parent[t]] # path halving
+            t = parent[t]
+        return t
+
+    def union(self, a, b):
+        ra = self.find(a)
+        rb = self.find(b)
+        if ra == rb:
+            return
+        if len(self.members[ra]) < len(self.members[rb]):
+            ra, rb = rb, ra
+
+        self.parent[rb] = ra
+        self.members[ra].update(self.members.pop(rb))
+        if rb in self.broken:
+            self.broken.discard(rb)
+            self.broken.add(ra)
+
+    def link(self, x, y): # join the covered neighbours of a revealed numbered tile
+        first = None
+        for nx, ny in NEIGHBOURS[y][x]:
+            if not self.revealed[ny][nx] and not self.flags[ny][nx]:
+                t = (nx, ny)
+                if t not in self.parent:
+                    self.parent[t] = t
+                    self.members[t] = {t}
+                if first is None:
+                    first = t
+                else:
+                    self.union(first, t)
+
+    def update(self, x, y): # (x, y) may just have been revealed or flagged
+        if not self.revealed[y][x] and not self.flags[y][x]:
+            return
+
+        t = (x, y)
+        if t in self.parent:
+            root = self.find(t)
+            if t in self.members[root]:
+                self.members[root].discard(t)
+                self.broken.add(root)
+                self.gone.append(t)
+
+        if self.revealed[y][x] and numbers[y][x] > 0 and t not in self.linked:
+            self.linked.add(t)
+            self.live.add(t)
+            self.link(x, y)
+
+    def rebuild(self, root): # regroup what is left of a group, walking it like build_frontier_groups
+        tiles = self.members.pop(root)
+
+        while tiles:
+            start = tiles.pop()
+            group = {start}
+            stack = [start]
+            while stack:
+                x, y = stack.pop()
+                for nx, ny in NEIGHBOURS[y][x]:
+                    if (nx, ny) in self.linked:
+                        for u in NEIGHBOURS[ny][nx]:
+                            if u in tiles:
+                                tiles.discard(u)
+                                group.add(u)
+                                stack.append(u)
+
+            for t in group:
+                self.parent[t] = start
+            self.members[start] = group
+
+    def groups(self):
+        while self.broken:
+            self.rebuild(self.broken.pop())
+
+        for t in self.gone:
+            del self.parent[t]
+            if t in self.members and not self.members[t]:
+                del self.members[t]
+        self.gone = []
+
+        return [set(m) for m in self.members.values() if m] # copies: the groups change as tiles do
+
+
+##### advanced solver sub-function 4 - within each frontier group, find the exact number of mines hidden
+
+def extract_constraints_for_group(group, revealed, flags):
+    constraints = []
+
+    for y in range(GRID_H):
+        for x in range(GRID_W):
+            if not revealed[y][x]:
+                continue
+            n = numbers[y][x]
+            if n == 0:
+                continue
+
+            frontier = []
+            flagged = 0
+
+            for nx, ny in NEIGHBOURS[y][x]:
+                if flags[ny][nx]:
+                    flagged += 1
+                elif (nx, ny) in group:
+                    frontier.append((nx, ny))
+
+            if frontier:
+                constraints.append({
+                    "tiles": frontier,
+                    "count": n - flagged
+                })
+
+    return constraints
+# constraint = { "tiles": [(3,4), (4,4), (5,4)], "count": 2 }
+#              ...
+
+
+##### advanced solver sub-function 5 - convert "constraint" in an easier format to read for Tufty (indices instead of coordinates)
+
+def index_constraints(constraints, index_map):
+#    indexed = []
+#
+#    for c in constraints:
+#        idxs = [index_map[t] for t in c["tiles"]]
+#        indexed.append((idxs, c["count"]))
+#
+#    return indexed
+    indexed = []
+    for c in constraints:
+        m = 0
+        for t in c["tiles"]:
+            m |= (1 << index_map[t])
+        indexed.append((m, c["count"]))
+    return indexed
+# indexed = ([1, 2, 3], 2)    among tiles 1, 2, 3, there are two traps
+#           ...
+
+
+##### advanced solver sub-function 6 - enumerate mine assignments
+
+#def enumerate_group(group_size, constraints):
+#    valid_masks = []
+#
+#    for mask in range(1 << group_size): # 1 << group_size = 2^group_size: total nb of possible trap patterns in the group
+#        ok = True # assume this patern is correct, then try to falsify it
+#
+#        for idxs, count in constraints: # among all tiles indexed in idxs, count must be traps
+#            c = 0
+#            for i in idxs:
+#                if mask & (1 << i):
+#                    c += 1
+#                    # & is bitwise version of AND, so (1 << i) is interpreted as the bit shifter in that case.
+#                    # For each tile in idxs, count how many of them are marked as mines in this mask.
+#            if c != count:
+#                ok = False
+#                break
+#
+#        if ok:
+#            valid_masks.append(mask)
+#
+#    return valid_masks
+def popcount(x):
+    c = 0
+    while x:
+        x &= x - 1   # drop lowest set bit
+        c += 1
+    return c
+def enumerate_group(group_size, constraints):
+    valid_masks = []
+    search_group(group_size, constraints, valid_masks.append)
+    return valid_masks
+
+
+##### advanced solver sub-function 6b - backtracking over the tiles of a group
+# Trying all 1 << group_size masks stopped being practical past MAX_GROUP = 12 tiles. Instead the
+# tiles get a mine or not one at a time, ordered so each constraint is finished as early as
+# possible, and a branch is dropped as soon as a constraint has too many mines or too few tiles
+# left for the mines it still needs. Only valid assignments are ever completed.
+# visit(mask) is called for each of them; when it returns True the search stops.
+# search_steps is the search itself, as a generator that yields every slice_nodes tiles assigned
+# (never with slice_nodes = 0), so the hints can spread a big group over several frames. It keeps
+# its own stack instead of recursing, which also spares core 1's small thread stack.
+
+def search_group(group_size, constraints, visit):
+    for _ in search_steps(group_size, constraints, visit, 0):
+        pass
+
+def search_steps(group_size, constraints, visit, slice_nodes):
+    # tile order: constraints from the smallest, each adding its tiles that are not ordered yet
+    order = []
+    ordered = 0
+    for cmask, count in sorted(constraints, key=lambda c: popcount(c[0])):
+        for i in range(group_size):
+            if cmask >> i & 1 and not ordered >> i & 1:
+                ordered |= 1 << i
+                order.append(i)
+    for i in range(group_size): # not in any constraint (never the case for a frontier group)
+        if not ordered >> i & 1:
+            order.append(i)
+
+    touching = [[] for _ in range(group_size)] # constraints each tile is in
+    need = [] # mines each constraint still needs
+    left = [] # tiles each constraint still has unassigned
+    for c in range(len(constraints)):
+        cmask, count = constraints[c]
+        need.append(count)
+        left.append(popcount(cmask))
+        if not 0 <= count <= left[c]:
+            return
+        for i in range(group_size):
+            if cmask >> i & 1:
+                touching[i].append(c)
+
+    tried = [0] * group_size # at each depth: 0 nothing yet, 1 tile safe tried, 2 mine tried too
+    mask = 0 # tiles order[:k] are assigned in mask
+    k = 0
+    nodes = 0
+
+    while k >= 0:
+        if k == group_size:
+            if visit(mask):
+                return
+            k -= 1
+            continue
+
+        i = order[k]
+        cs = touching[i]
+
+        if tried[k] == 0: # i safe: every constraint must still fit its mines in the tiles left
+            tried[k] = 1
+            nodes += 1
+            if nodes == slice_nodes:
+                nodes = 0
+                yield
+            ok = True
+            for c in cs:
+                left[c] -= 1
+                if need[c] > left[c]:
+                    ok = False
+            if ok:
+                k += 1
+
+        elif tried[k] == 1: # i a mine
+            tried[k] = 2
+            ok = True
+            for c in cs:
+                need[c] -= 1
+                if need[c] < 0:
+                    ok = False
+            if ok:
+                mask |= 1 << i
+                k += 1
+
+        else: # both done: undo and back up
+            tried[k] = 0
+            if mask >> i & 1:
+                mask ^= 1 << i
+            for c in cs:
+                need[c] += 1
+                left[c] += 1
+            k -= 1
+
+
+##### advanced solver sub-function 7 - deduction: finds certainly safe and certainly trapped tiles
+
+def deduce_from_masks(masks, group_size):
+    if not masks:
+        return {}, {}
+
+    always_mine = [True] * group_size
+    always_safe = [True] * group_size
+
+    for mask in masks:
+        for i in range(group_size):
+            if mask & (1 << i): # true if i is a mine in this mask
+                always_safe[i] = False # not safe for sure because i is a mine in this mask
+            else:
+                always_mine[i] = False # not trapped for sure because i is not a mine in this mask
+
+    mines = set(i for i in range(group_size) if always_mine[i])
+    safe = set(i for i in range(group_size) if always_safe[i])
+
+    return mines, safe
+
+
+##### advanced solver sub-function 7b - the same deduction straight from search_group, without
+# keeping the masks. It stops as soon as every tile has been seen both as a mine and as safe.
+# Results go through the group cache below. Returns (mine indices, safe indices).
+# deduce_steps is the same as a generator that yields every slice_nodes tiles the search assigns.
+
+def deduce_group(group_size, constraints):
+    return finish(deduce_steps(group_size, constraints, 0))
+
+def deduce_steps(group_size, constraints, slice_nodes):
+    if GROUP_CACHE_SIZE:
+        key = (group_size,) + tuple(sorted(constraints))
+        found = _cache_get(key)
+        if found is None:
+            found = yield from _deduce_masks(group_size, constraints, slice_nodes)
+            _cache_put(key, found)
+    else:
+        found = yield from _deduce_masks(group_size, constraints, slice_nodes)
+
+    mine_mask, safe_mask = found
+    mines = set(i for i in range(group_size) if mine_mask >> i & 1)
+    safe = set(i for i in range(group_size) if safe_mask >> i & 1)
+
+    return mines, safe
+
+def _deduce_masks(group_size, constraints, slice_nodes): # (always a mine, always safe) as masks
+    full = (1 << group_size) - 1
+    seen = [0, full, 0] # OR of all masks, AND of all masks, number of masks
+
+    def visit(mask):
+        seen[0] |= mask
+        seen[1] &= mask
+        seen[2] += 1
+        return seen[0] == full and seen[1] == 0 # nothing certain left
+
+    yield from search_steps(group_size, constraints, visit, slice_nodes)
+    if not seen[2]:
+        return 0, 0
+
+    return seen[1], full & ~seen[0]
+
+
+##### group cache - the same constraint systems come up again and again (1-2-1 shapes, small
+# isolated groups), within one solve and from one generation attempt to the next. LRU over
+# GROUP_CACHE_SIZE entries, keyed by the group size and its sorted indexed constraints, holding
+# two masks. Shared by both cores, hence the lock.
+
+GROUP_CACHE_SIZE = 48 # entries (each a few hundred bytes at most), 0 = no cache
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+_cache = {} # key -> [last use, (mine mask, safe mask)]
+_cache_tick = 0
+
+try:
+    import _thread
+    _cache_lock = _thread.allocate_lock()
+except ImportError:
+    _cache_lock = None
+
+def _cache_get(key):
+    global _cache_tick
+
+    if _cache_lock:
+        _cache_lock.acquire()
+    entry = _cache.get(key)
+    if entry is None:
+        cache_stats["misses"] += 1
+        found = None
+    else:
+        cache_stats["hits"] += 1
+        _cache_tick += 1
+        entry[0] = _cache_tick
+        found = entry[1]
+    if _cache_lock:
+        _cache_lock.release()
+
+    return found
+
+def _cache_put(key, found):
+    global _cache_tick
+
+    if _cache_lock:
+        _cache_lock.acquire()
+    if key not in _cache and len(_cache) >= GROUP_CACHE_SIZE:
+        oldest = None
+        for k in _cache: # least recently used - a scan is fine for a few dozen entries
+            if oldest is None or _cache[k][0] < _cache[oldest][0]:
+                oldest = k
+        del _cache[oldest]
+        cache_stats["evictions"] += 1
+    _cache_tick += 1
+    _cache[key] = [_cache_tick, found]
+    if _cache_lock:
+        _cache_lock.release()
+
+def cache_info(): # hits, misses, evictions, entries and hit rate, to size GROUP_CACHE_SIZE
+    info = dict(cache_stats)
+    info["entries"] = len(_cache)
+    lookups = info["hits"] + info["misses"]
+    info["hit_rate"] = info["hits"] / lookups if lookups else 0.0
+    return info
+
+def clear_cache():
+    _cache.clear()
+    for k in cache_stats:
+        cache_stats[k] = 0
+
+
+##### advanced solver sub-function 8
+
+def apply_group_deductions(group_tiles, mine_idxs, safe_idxs, flags, revealed):
+    progress = False
+
+    for i in mine_idxs:
+        x, y = group_tiles[i]
+        if not flags[y][x]:
+            flags[y][x] = True
+            progress = True
+
+    for i in safe_idxs:
+        x, y = group_tiles[i]
+        if not revealed[y][x]:
+            revealed[y][x] = True
+            progress = True
+
+    return progress
+
+
+##### advanced solver sub-function 9
+
+def solve_frontier_group(group, revealed, flags):
+    # row by row, as the bitboard bits: a shape gets the same indices wherever it is (group cache)
+    group_tiles = sorted(group, key=lambda t: (t[1], t[0]))
+    if len(group_tiles) > MAX_GROUP:
+        return False
+
+    index = {t: i for i, t in enumerate(group_tiles)}
+
+    constraints = extract_constraints_for_group(group, revealed, flags)
+    indexed = index_constraints(constraints, index)
+
+    return solve_indexed_group(group_tiles, indexed, revealed, flags)
+
+def solve_indexed_group(group_tiles, indexed, revealed, flags):
+    if len(group_tiles) > MAX_GROUP:
+        return False
+
+    mines, safe = deduce_group(len(group_tiles), indexed)
+    return apply_group_deductions(group_tiles, mines, safe, flags, revealed)
+
+
+##### advanced solver sub-function 9b - constraint index, built once per rule 5 round
+# extract_constraints_for_group walks the whole grid for every group. Here each revealed numbered
+# tile still next to the frontier (the tracker's live tiles) is visited once: its covered
+# neighbours as a mask over its group's tiles, and the mines it still needs, go straight to the
+# group they belong to. Tiles with nothing covered around them left are dropped from live.
+# Returns (tiles of each group, row by row, [indexed constraints of each group]).
+
+def index_groups(groups, live, revealed, flags):
+    group_tiles = []
+    where = {} # frontier tile -> (group, index in the group)
+    for g in range(len(groups)):
+        tiles = sorted(groups[g], key=lambda t: (t[1], t[0]))
+        group_tiles.append(tiles)
+        for i in range(len(tiles)):
+            where[tiles[i]] = (g, i)
+
+    constraints = [[] for _ in groups]
+    dead = []
+    for x, y in live:
+        g = -1
+        m = 0
+        flagged = 0
+        for t in NEIGHBOURS[y][x]:
+            if flags[t[1]][t[0]]:
+                flagged += 1
+            elif t in where:
+                g, i = where[t]
+                m |= 1 << i
+        if m:
+            constraints[g].append((m, numbers[y][x] - flagged))
+        else:
+            dead.append((x, y))
+
+    for t in dead:
+        live.discard(t)
+
+    return group_tiles, constraints
+
+
+##### advanced solver sub-function 10 - rules 2-4 then rule 5, in rounds, until rule 5 finds nothing
+# frontier_steps yields after each round, so the generation screen can do something in between.
+
+def frontier_rounds(queue, queued, s_revealed, s_flags):
+    for _ in frontier_steps(queue, queued, s_revealed, s_flags):
+        pass
+
+def frontier_steps(queue, queued, s_revealed, s_flags):
+    frontier = FrontierTracker(s_revealed, s_flags)
+    progress = True
+
+    while progress:
+        yield
+
+        # rules 2, 3 & 4
+        propagate(queue, queued, s_revealed, s_flags, True, frontier)
+
+        # rule 5 - frontiere grouping, once rules 2-4 have nothing left to check
+        # Groups are rebuilt after each deduction: a tile revealed in one group can touch another
+        # group, whose constraints would then miss a covered tile and deduce wrong.
+        progress = False
+        group_tiles, constraints = index_groups(frontier.groups(), frontier.live, s_revealed, s_flags)
+        for g in range(len(group_tiles)):
+            if solve_indexed_group(group_tiles[g], constraints[g], s_revealed, s_flags):
+                progress = True
+                for x, y in group_tiles[g]:
+                    mark_dirty(x, y, s_revealed, queue, queued, frontier)
+                break
+
+        # rule 6 - only once rule 5 is stuck as well, it looks at the whole board
+        if COUNT_RULE and not progress:
+            import probability
+            for x, y in probability.apply_count_rule(s_revealed, s_flags):
+                progress = True
+                mark_dirty(x, y, s_revealed, queue, queued, frontier)
+
+
+##### advanced solver main
+
+def solver_advanced(start_x, start_y):
+    s_revealed = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+    s_flags = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+
+    # rule 1
+    if not flood_from(start_x, start_y, s_revealed):
+        return False
+
+    queue, queued = start_worklist(s_revealed)
+    frontier_rounds(queue, queued, s_revealed, s_flags)
+
+    return all_safe_revealed(s_revealed)
+
+
+##### tiered solver - one run, rules added in tier order on the same board
+# Returns the tier the board needed ("easy", "medium" or "difficult"), or "unsolvable" when even
+# the hardest tier asked for is not enough. Same answers as running solver_basic, solver_medium and
+# solver_advanced one after the other, without redoing the flood and rules 2 & 3 for each.
+# solve_tier_steps is the same as a generator: it yields the tier it is working on before each
+# bounded piece of work (each tier, each rule 5 round) and returns the result.
+
+TIERS = ("easy", "medium", "difficult")
+TIER_ORDER = TIERS + ("unsolvable",)
+
+def solve_tier(start_x, start_y, hardest="difficult"):
+    return finish(solve_tier_steps(start_x, start_y, hardest))
+
+def finish(steps): # run a *_steps generator to the end, and return what it returns
+    try:
+        while True:
+            next(steps)
+    except StopIteration as done:
+        return done.value
+
+def solve_tier_steps(start_x, start_y, hardest="difficult"):
+    yield "easy"
+    s_revealed = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+    s_flags = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+
+    # rule 1
+    if not flood_from(start_x, start_y, s_revealed):
+        return "unsolvable"
+
+    # easy: rules 2 & 3
+    queue, queued = start_worklist(s_revealed)
+    propagate(queue, queued, s_revealed, s_flags, False)
+    if all_safe_revealed(s_revealed):
+        return "easy"
+    if hardest == "easy":
+        return "unsolvable"
+
+    # medium: rule 4 as well - every numbered tile gets checked again, now for pairs
+    yield "medium"
+    queue, queued = start_worklist(s_revealed)
+    propagate(queue, queued, s_revealed, s_flags, True)
+    if all_safe_revealed(s_revealed):
+        return "medium"
+    if hardest == "medium":
+        return "unsolvable"
+
+    # difficult: rule 5 as well
+    for _ in frontier_steps(queue, queued, s_revealed, s_flags):
+        yield "difficult"
+    if all_safe_revealed(s_revealed):
+        return "difficult"
+
+    return "unsolvable"
+
+
+#################### Board generation ####################
+
+
+##### Lay out a fresh board for a first click at (cx, cy). With a seed, the board is always the same.
+# Returns the random numbers it drew from, so a local search can carry on with them.
+
+def new_board(cx, cy, board_seed=None):
+    global mines
+
+    rng = random if board_seed is None else board_rng(board_seed, cx, cy)
+    mines = [[False for _ in range(GRID_W)] for _ in range(GRID_H)]
+    place_mines_avoiding(cx, cy, rng)
+    compute_numbers()
+    return rng
+
+
+##### Check that the current board needs exactly the solver tier asked for
+
+def board_matches(difficulty, cx, cy):
+    if BITBOARD:
+        import bitboard
+        return bitboard.board_matches(difficulty, cx, cy)
+
+    # e.g. difficult: must fail easy & medium, but pass advanced
+    return difficulty in TIERS and solve_tier(cx, cy, difficulty) == difficulty
+
+
+##### Local search (SEARCH_STEPS > 0) - move mines on a rejected board instead of starting over,
+# see bitboard.search. Sets the board and returns True once it needs exactly that tier.
+
+def search_board(difficulty, cx, cy, rng):
+    global mines, numbers
+
+    import bitboard
+    bitboard.set_grid(GRID_W, GRID_H)
+    found = bitboard.search(bitboard.from_grid(mines), cx, cy, difficulty, SEARCH_STEPS, rng)
+    if found is None:
+        return False
+
+    mines = bitboard.to_grid(found)
+    numbers = [[0 for _ in range(GRID_W)] for _ in range(GRID_H)]
+    compute_numbers()
+    return True
+
+
+##### Keep generating boards until one matches the difficulty. Returns the number of attempts.
+# on_attempt(count) is called before each board is solved (the game uses it to draw the counter).
+# If it returns True, the board was set from somewhere else (the second core) and the loop stops.
+# Attempts use seeds first_seed, first_seed + 1, ... and the accepted one is kept in engine.seed:
+# generate_board(difficulty, cx, cy, first_seed=seed) on the same grid, with the same SEARCH_STEPS,
+# gives the same board again (new_board(cx, cy, seed) alone does when SEARCH_STEPS is 0).
+
+def generate_board(difficulty, cx, cy, on_attempt=None, first_seed=None):
+    attempts = 0
+
+    for count, tier in generate_steps(difficulty, cx, cy, first_seed):
+        if count != attempts:
+            attempts = count
+            if on_attempt is not None and on_attempt(attempts):
+                return attempts
+
+    return attempts
+
+
+##### generate_board as a generator, one bounded piece of work per step, no threads needed
+# Yields (attempts so far, tier being checked) - the tier is None on the bitboard / local search
+# paths, which solve a board in one go. Stopping early (just dropping the generator) leaves
+# engine.mines on a rejected board and engine.seed None; once it finishes, the board is set.
+
+def generate_steps(difficulty, cx, cy, first_seed=None):
+    global seed
+
+    if first_seed is None:
+        first_seed = random.getrandbits(30)
+
+    seed = None
+    attempts = 0
+
+    while True:
+        board_seed = (first_seed + attempts) & 0xFFFFFFFF
+        attempts += 1
+        rng = new_board(cx, cy, board_seed)
+
+        if SEARCH_STEPS or BITBOARD or difficulty not in TIERS:
+            yield attempts, None
+            ok = search_board(difficulty, cx, cy, rng) if SEARCH_STEPS else board_matches(difficulty, cx, cy)
+        else:
+            steps = solve_tier_steps(cx, cy, difficulty)
+            try:
+                while True:
+                    yield attempts, next(steps)
+            except StopIteration as done:
+                ok = done.value == difficulty
+
+        if ok:
+            seed = board_seed
+            return
+
+
+#################### In-game functions ####################
+
+
+##### auto-reveal connected tiles with 0 neighbouring traps
+
+def auto_reveal(start_x, start_y):
+    stack = [(start_x, start_y)]
+
+    while stack:
+        x, y = stack.pop()
+
+        if revealed[y][x]:
+            continue
+        if flags[y][x]:
+            continue
+
+        revealed[y][x] = True
+
+        # If this tile is truly not trapped, find and reveal neighbouring empty tiles (if any)
+        if numbers[y][x] == 0:
+            for nx, ny in NEIGHBOURS[y][x]:
+                if not revealed[ny][nx] and not mines[ny][nx]:
+                    stack.append((nx, ny))
+
+
+##### check if game is won / complete
+
+def check_win(): # win = all remaining covered tiles hide traps 
+    for y in range(GRID_H):
+        for x in range(GRID_W):
+            if not mines[y][x] and not revealed[y][x]:
+                return False
+    return True
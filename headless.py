@@ -0,0 +1,209 @@
+##### Hardware stand-ins
+# A display that only counts draw calls, buttons that follow a script, and a ticks_ms clock for
+# CPython. install() registers this module as picographics / pimoroni (and machine when there is
+# none), so mine_sweeper.py can be imported and its frames timed off the Tufty - or on it.
+
+import sys
+import time as _time
+
+
+DISPLAY_TUFTY_2040 = 0
+
+
+##### Display that counts draw calls instead of drawing
+
+class PicoGraphics:
+    headless = True
+
+    def __init__(self, display=DISPLAY_TUFTY_2040, **kwargs):
+        self.width = 320
+        self.height = 240
+        self.pen = 0
+        self.font = "bitmap8"
+        self.backlight = 1.0
+        self.calls = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def reset_counts(self):
+        self.calls = {}
+
+    def draw_calls(self): # everything except pen / font changes and update()
+        total = 0
+        for name, count in self.calls.items():
+            if name not in ("set_pen", "set_font", "update"):
+                total += count
+        return total
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def set_backlight(self, value):
+        self.backlight = value
+
+    def create_pen(self, r, g, b): # RGB565, like the real thing
+        return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+    def set_pen(self, pen):
+        self.pen = pen
+        self._count("set_pen")
+
+    def set_font(self, font):
+        self.font = font
+        self._count("set_font")
+
+    def clear(self):
+        self._count("clear")
+
+    def rectangle(self, x, y, w, h):
+        self._count("rectangle")
+
+    def line(self, x1, y1, x2, y2, *args):
+        self._count("line")
+
+    def pixel(self, x, y):
+        self._count("pixel")
+
+    def text(self, text, x, y, wordwrap=-1, scale=2, *args):
+        self._count("text")
+
+    def measure_text(self, text, scale=2, *args):
+        return len(text) * 6 * scale
+
+    def update(self):
+        self._count("update")
+
+
+##### Buttons driven by a script - one entry per frame
+
+_buttons = []
+
+class Button:
+    def __init__(self, pin, invert=True, repeat_time=200, hold_time=1000):
+        self.pin = pin
+        self.script = []
+        self.last_state = False
+        self.repeat_time = repeat_time
+        self.hold_time = hold_time
+        self.pressed_time = 0
+        self.last_time = 0
+        _buttons.append(self)
+
+    def feed(self, frames): # e.g. feed([True, True, False]): held for two frames, then released
+        self.script.extend(frames)
+
+    def raw(self):
+        return bool(self.script) and self.script[0]
+
+    def read(self): # True on the press edge, then auto-repeats while held, like pimoroni.Button
+        now = clock.ticks_ms()
+        state = self.raw()
+        changed = state != self.last_state
+        self.last_state = state
+
+        if changed:
+            self.pressed_time = now if state else 0
+            self.last_time = now if state else 0
+            return state
+
+        if state and self.repeat_time:
+            repeat = self.repeat_time
+            if self.hold_time and now - self.pressed_time > self.hold_time:
+                repeat /= 3
+            if now - self.last_time > repeat:
+                self.last_time = now
+                return True
+
+        return False
+
+    @property
+    def is_pressed(self):
+        return self.raw()
+
+
+def step(): # move every scripted button on to its next frame
+    for button in _buttons:
+        if button.script:
+            button.script.pop(0)
+
+
+##### machine stand-ins
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, pin, *args, **kwargs):
+        self.pin = pin
+
+    def value(self, *args):
+        return 0
+
+    def irq(self, handler=None, trigger=0, *args, **kwargs):
+        return None
+
+
+class PWM:
+    def __init__(self, pin, *args, **kwargs):
+        self.pin = pin
+
+    def freq(self, *args):
+        return 0
+
+    def duty_u16(self, *args):
+        return 0
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+def idle():
+    pass
+
+def disable_irq():
+    return 0
+
+def enable_irq(state):
+    pass
+
+
+##### ticks_* clock for CPython (MicroPython has these on its own time module)
+
+class Clock:
+    def ticks_ms(self):
+        return _time.time_ns() // 1000000
+
+    def ticks_us(self):
+        return _time.time_ns() // 1000
+
+    def ticks_diff(self, new, old):
+        return new - old
+
+    def ticks_add(self, ticks, delta):
+        return ticks + delta
+
+    def sleep(self, seconds):
+        _time.sleep(seconds)
+
+    def sleep_ms(self, ms):
+        _time.sleep(ms / 1000)
+
+clock = Clock()
+
+
+##### register the stand-ins
+
+def install():
+    me = sys.modules[__name__]
+    sys.modules["picographics"] = me
+    sys.modules["pimoroni"] = me
+
+    try:
+        import machine
+    except ImportError:
+        sys.modules["machine"] = me
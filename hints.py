@@ -0,0 +1,179 @@
+##### Live hints - tiles the player's view of the board proves safe or trapped
+# Works only from what is on the screen: the numbers the player has revealed (and the traps they
+# fell into), never the player's flags, which may be wrong, and never the number under a tile
+# the hints found safe but the player hasn't opened. Rules 2-3, the rule 4 overlap and rule 5
+# (frontier groups through engine.deduce_steps, so the group cache is shared) run over board-wide
+# TILE_BITS masks until none of them finds anything new.
+#
+# The work is a generator stepped for a few ms per frame (step()), so it never holds up a frame.
+# A player move restarts it on the new board (restart()), dropping the stale job but keeping
+# what was proved so far: a deduction stays true when more tiles are opened.
+
+import time
+import engine
+
+if not hasattr(time, "ticks_ms"): # CPython
+    from headless import clock as time
+
+
+MAX_GROUP = 24 # bigger frontier groups are left out
+SEARCH_NODES = 16 # tiles the rule 5 search assigns per step, a fraction of HINT_SLICE_MS even on the RP2040
+
+safe_mask = 0 # tiles proved safe, as engine.TILE_BITS
+mine_mask = 0 # tiles proved trapped
+_job = None
+
+
+##### new game: forget everything proved on the last board
+
+def reset():
+    global safe_mask, mine_mask, _job
+
+    safe_mask = 0
+    mine_mask = 0
+    _job = None
+
+
+##### the board changed: start over from a snapshot of it
+
+def restart(revealed):
+    global _job
+
+    _job = _analyse([row[:] for row in revealed])
+
+def busy():
+    return _job is not None
+
+
+##### run the job for up to budget_ms. Returns True if safe_mask / mine_mask changed.
+
+def step(budget_ms):
+    global _job
+
+    if _job is None:
+        return False
+
+    before = (safe_mask, mine_mask)
+    deadline = time.ticks_add(time.ticks_ms(), budget_ms)
+    while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+        try:
+            next(_job)
+        except StopIteration:
+            _job = None
+            break
+
+    return (safe_mask, mine_mask) != before
+
+
+##### the deductions - yields between small pieces of work
+
+def _learn(mines, safe):
+    global safe_mask, mine_mask
+
+    mine_mask |= mines
+    safe_mask |= safe
+
+def _analyse(revealed):
+    GRID_W = engine.GRID_W
+    numbers = engine.numbers
+    popcount = engine.popcount
+
+    # what the player sees: a number is "count mines among these tiles"
+    known = []
+    seen = 0
+    for y in range(engine.GRID_H):
+        for x in range(GRID_W):
+            if revealed[y][x]:
+                bit = engine.TILE_BITS[y][x]
+                if engine.mines[y][x]:
+                    _learn(bit, 0)
+                else:
+                    seen |= bit
+                    around = 0
+                    for nx, ny in engine.NEIGHBOURS[y][x]:
+                        around |= engine.TILE_BITS[ny][nx]
+                    known.append((around, numbers[y][x]))
+        yield
+    _learn(0, seen)
+
+    progress = True
+    while progress:
+        progress = False
+
+        # every number as (covered tiles still unknown, mines among them)
+        live = []
+        for around, n in known:
+            hidden = around & ~safe_mask & ~mine_mask
+            if hidden:
+                live.append((hidden, n - popcount(around & mine_mask)))
+
+        # rules 2 & 3
+        for hidden, left in live:
+            if left == popcount(hidden):
+                _learn(hidden, 0)
+                progress = True
+            elif left == 0:
+                _learn(0, hidden)
+                progress = True
+        yield
+        if progress:
+            continue
+
+        # rule 4 - overlap of two numbers (both are true statements, so any pair can be used)
+        for i in range(len(live)):
+            h1, r1 = live[i]
+            for j in range(len(live)):
+                h2, r2 = live[j]
+                if i == j or not h1 & h2:
+                    continue
+                only1 = h1 & ~h2
+                only2 = h2 & ~h1
+                if (only1 or only2) and r2 - r1 == popcount(only2):
+                    if only2 & ~mine_mask or only1 & ~safe_mask:
+                        _learn(only2, only1)
+                        progress = True
+            yield
+        if progress:
+            continue
+
+        # rule 5 - frontier groups: numbers that share covered tiles, enumerated together
+        groups = [] # [tiles mask, [(hidden, left), ...]]
+        for c in live:
+            merged = [c[0], [c]]
+            for g in groups[:]:
+                if g[0] & merged[0]:
+                    merged[0] |= g[0]
+                    merged[1].extend(g[1])
+                    groups.remove(g)
+            groups.append(merged)
+        yield
+
+        for tiles, constraints in groups:
+            size = popcount(tiles)
+            if size > MAX_GROUP:
+                continue
+
+            bits = [] # group index -> board bit
+            for b in range(engine.GRID_W * engine.GRID_H):
+                if tiles >> b & 1:
+                    bits.append(1 << b)
+
+            indexed = []
+            for hidden, left in constraints:
+                m = 0
+                for i in range(size):
+                    if hidden & bits[i]:
+                        m |= 1 << i
+                indexed.append((m, left))
+
+            mines, safe = yield from engine.deduce_steps(size, indexed, SEARCH_NODES)
+            found_mines = 0
+            found_safe = 0
+            for i in mines:
+                found_mines |= bits[i]
+            for i in safe:
+                found_safe |= bits[i]
+            if found_mines & ~mine_mask or found_safe & ~safe_mask:
+                _learn(found_mines, found_safe)
+                progress = True
+            yield
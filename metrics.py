@@ -0,0 +1,255 @@
+##### Solver and generator metrics - off unless enable() is called
+#
+#   >>> import metrics
+#   >>> metrics.enable()
+#   ... play, or engine.generate_board(...) ...
+#   >>> metrics.report()          (or metrics.snapshot() for a dict)
+#
+# enable() swaps timed / counting wrappers in for engine functions (engine code calls its own
+# functions through the module globals, so it picks them up too) and bitboard.solve_tier, and sets
+# engine.METRICS for the few rule counters inside propagate. disable() puts the originals back, so
+# with metrics off the only cost left is an "if METRICS:" on each rule 2-4 deduction.
+# The bitboard backend - most boards on the Tufty: core 1 (worker.py), the pool top-up with
+# engine.BITBOARD - is timed per solve_tier call, and its rule 5 groups go through deduce_group /
+# search_steps like the engine's, but its rules 1-4 are not counted. The worker's own attempts
+# and accepted boards per difficulty are in the snapshot as well. Both cores update the counters,
+# so they are behind a lock.
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+import time
+import engine
+import bitboard
+import worker
+
+if not hasattr(time, "ticks_us"): # CPython
+    from headless import clock as time
+
+
+# engine functions timed per call; the generators are timed per step
+TIMED = ("solver_basic", "solver_medium", "solver_advanced", "solve_tier", "propagate", "index_groups",
+         "deduce_group", "board_matches", "new_board")
+TIMED_STEPS = ("solve_tier_steps", "frontier_steps")
+
+counts = {}       # rule1 .. rule5, masks, max_group_rejected
+times = {}        # function -> [calls, us]
+group_sizes = {}  # frontier group size -> groups seen by rule 5
+boards = {}       # difficulty -> [accepted boards, attempts]
+_originals = {}
+_bitboard_solve_tier = None
+_lock = _thread.allocate_lock() if _thread else None
+
+
+def count(name, n=1):
+    if _lock:
+        _lock.acquire()
+    counts[name] = counts.get(name, 0) + n
+    if _lock:
+        _lock.release()
+
+def _add_time(name, us):
+    if _lock:
+        _lock.acquire()
+    t = times.get(name)
+    if t is None:
+        t = times[name] = [0, 0]
+    t[0] += 1
+    t[1] += us
+    if _lock:
+        _lock.release()
+
+def _tally(table, key, n=1):
+    if _lock:
+        _lock.acquire()
+    table[key] = table.get(key, 0) + n
+    if _lock:
+        _lock.release()
+
+
+##### wrappers
+
+def _timed(name, f):
+    def timed(*args):
+        start = time.ticks_us()
+        try:
+            return f(*args)
+        finally:
+            _add_time(name, time.ticks_diff(time.ticks_us(), start))
+    return timed
+
+def _timed_steps(name, f):
+    def timed(*args):
+        steps = f(*args)
+        while True:
+            start = time.ticks_us()
+            try:
+                value = next(steps)
+            except StopIteration as done:
+                _add_time(name, time.ticks_diff(time.ticks_us(), start))
+                return done.value
+            _add_time(name, time.ticks_diff(time.ticks_us(), start))
+            yield value
+    return timed
+
+def _flood_from(f):
+    def flood_from(*args):
+        count("rule1")
+        return f(*args)
+    return flood_from
+
+def _search_steps(f): # every valid assignment the backtracking completes
+    def search_steps(group_size, constraints, visit, slice_nodes):
+        def counted(mask):
+            count("masks")
+            return visit(mask)
+        return f(group_size, constraints, counted, slice_nodes)
+    return search_steps
+
+def _solve_indexed_group(f):
+    def solve_indexed_group(group_tiles, indexed, revealed, flags):
+        size = len(group_tiles)
+        _tally(group_sizes, size)
+        if size > engine.MAX_GROUP:
+            count("max_group_rejected")
+        found = f(group_tiles, indexed, revealed, flags)
+        if found:
+            count("rule5")
+        return found
+    return solve_indexed_group
+
+def _generate_steps(f): # attempts per accepted board, per difficulty
+    def generate_steps(difficulty, cx, cy, first_seed=None):
+        attempts = 0
+        for step in f(difficulty, cx, cy, first_seed):
+            attempts = step[0]
+            yield step
+        if _lock:
+            _lock.acquire()
+        b = boards.get(difficulty)
+        if b is None:
+            b = boards[difficulty] = [0, 0]
+        b[0] += 1
+        b[1] += attempts
+        if _lock:
+            _lock.release()
+    return generate_steps
+
+
+##### on / off
+
+def enable():
+    global _bitboard_solve_tier
+
+    if _originals:
+        return
+
+    wrapped = {}
+    for name in TIMED:
+        wrapped[name] = _timed(name, getattr(engine, name))
+    for name in TIMED_STEPS:
+        wrapped[name] = _timed_steps(name, getattr(engine, name))
+    wrapped["flood_from"] = _timed("flood_from", _flood_from(engine.flood_from)) # rule 1
+    wrapped["search_steps"] = _search_steps(engine.search_steps)
+    wrapped["solve_indexed_group"] = _solve_indexed_group(engine.solve_indexed_group)
+    wrapped["generate_steps"] = _generate_steps(engine.generate_steps)
+
+    for name, f in wrapped.items():
+        _originals[name] = getattr(engine, name)
+        setattr(engine, name, f)
+    _bitboard_solve_tier = bitboard.solve_tier
+    bitboard.solve_tier = _timed("bitboard.solve_tier", _bitboard_solve_tier)
+    engine.METRICS = True
+
+def disable():
+    global _bitboard_solve_tier
+
+    for name, f in _originals.items():
+        setattr(engine, name, f)
+    _originals.clear()
+    if _bitboard_solve_tier is not None:
+        bitboard.solve_tier = _bitboard_solve_tier
+        _bitboard_solve_tier = None
+    engine.METRICS = False
+
+def enabled():
+    return bool(_originals)
+
+def reset(): # worker.made is the worker's, and counts from its start
+    if _lock:
+        _lock.acquire()
+    counts.clear()
+    times.clear()
+    group_sizes.clear()
+    boards.clear()
+    if _lock:
+        _lock.release()
+
+
+##### read out
+
+def snapshot():
+    if _lock:
+        _lock.acquire()
+    timing = {}
+    for name, (calls, us) in times.items():
+        timing[name] = {"calls": calls, "ms": us / 1000, "ms_per_call": us / calls / 1000}
+
+    per_board = {}
+    for difficulty, (accepted, attempts) in boards.items():
+        per_board[difficulty] = {"boards": accepted, "attempts": attempts, "attempts_per_board": attempts / accepted}
+
+    data = {
+        "enabled": enabled(),
+        "counts": dict(counts),
+        "times": timing,
+        "group_sizes": dict(group_sizes),
+        "generation": per_board,
+    }
+    if _lock:
+        _lock.release()
+
+    # core 1, counted by the worker itself whether metrics are on or not
+    if worker._lock:
+        worker._lock.acquire()
+    made = {}
+    for difficulty, (attempts, accepted) in worker.made.items():
+        made[difficulty] = {"boards": accepted, "attempts": attempts,
+                            "attempts_per_board": attempts / accepted if accepted else None}
+    data["worker"] = {"attempts": worker.attempts, "made": made}
+    if worker._lock:
+        worker._lock.release()
+
+    return data
+
+def report():
+    data = snapshot()
+
+    print("rules    " + "  ".join(f"{name} {data['counts'].get(name, 0)}" for name in
+                                  ("rule1", "rule2", "rule3", "rule4", "rule5")))
+    masks = data["counts"].get("masks", 0)
+    rejected = data["counts"].get("max_group_rejected", 0)
+    print(f"rule 5   {masks} masks enumerated  {rejected} groups over MAX_GROUP ({engine.MAX_GROUP})")
+
+    for name in sorted(data["times"]):
+        t = data["times"][name]
+        calls, ms, per_call = t["calls"], t["ms"], t["ms_per_call"]
+        print(f"time     {name:18} {calls:8} calls {ms:10.1f} ms {per_call:9.3f} ms/call")
+
+    sizes = data["group_sizes"]
+    if sizes:
+        print("groups   " + "  ".join(f"{size}:{sizes[size]}" for size in sorted(sizes)))
+
+    for difficulty in engine.TIERS:
+        g = data["generation"].get(difficulty)
+        if g is not None:
+            accepted, per_board = g["boards"], g["attempts_per_board"]
+            print(f"generate {difficulty:9} {accepted} boards  {per_board:.1f} attempts/board")
+
+    for difficulty in engine.TIERS:
+        g = data["worker"]["made"].get(difficulty)
+        if g is not None:
+            accepted, attempts = g["boards"], g["attempts"]
+            print(f"worker   {difficulty:9} {accepted} boards  {attempts} attempts")
@@ -0,0 +1,220 @@
+##### Exact mine probabilities, using the total mine count
+# Each frontier group is enumerated once (engine.search_group), with its valid assignments counted
+# by how many mines they use and, for each tile, by how many of them put a mine there. The covered
+# tiles away from the frontier ("interior") have no constraint but share the mines left over, so
+# a board-wide count is a product over groups times C(interior, mines left - frontier mines).
+# Groups are combined by convolving their counts over mine totals, never by enumerating across
+# groups, so the cost stays polynomial in the number of groups.
+#
+# Also gives rule 6 for the advanced solver: a tile that is a mine in all or none of the
+# board-wide assignments is certain, e.g. endgames where only the mine count splits a 50/50.
+
+import engine
+
+
+##### C(n, k), with 0 outside 0 <= k <= n (MicroPython has no math.comb)
+
+def binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    k = min(k, n - k)
+    c = 1
+    for i in range(k):
+        c = c * (n - i) // (i + 1)
+    return c
+
+
+##### ways[k] = valid assignments of the group with k mines, tile_ways[k][i] = those with a mine on i
+
+def group_counts(group_size, constraints):
+    ways = [0] * (group_size + 1)
+    tile_ways = [[0] * group_size for _ in range(group_size + 1)]
+
+    def visit(mask):
+        k = engine.popcount(mask)
+        ways[k] += 1
+        row = tile_ways[k]
+        for i in range(group_size):
+            if mask >> i & 1:
+                row[i] += 1
+
+    engine.search_group(group_size, constraints, visit)
+    return ways, tile_ways
+
+
+def convolve(a, b):
+    out = [0] * (len(a) + len(b) - 1)
+    for i in range(len(a)):
+        if a[i]:
+            for j in range(len(b)):
+                out[i + j] += a[i] * b[j]
+    return out
+
+
+##### Count every board-wide assignment
+# groups: [(group_size, indexed constraints), ...], interior: covered tiles on no constraint,
+# mines_left: mines not flagged yet. Returns (total, [mine count per tile, per group], mine count
+# per interior tile), all exact integers - divide by total for probabilities. None if no
+# assignment fits the mine count (the flags or the count are wrong).
+
+def count_assignments(groups, interior, mines_left):
+    counts = [group_counts(size, constraints) for size, constraints in groups]
+
+    ways = [1]
+    for group_ways, _ in counts:
+        ways = convolve(ways, group_ways)
+
+    total = 0
+    interior_mines = 0
+    for m in range(len(ways)):
+        if ways[m]:
+            total += ways[m] * binomial(interior, mines_left - m)
+            interior_mines += ways[m] * binomial(interior - 1, mines_left - m - 1)
+
+    if total == 0:
+        return None
+
+    tile_mines = []
+    for g in range(len(counts)):
+        others = [1] # every other group together
+        for h in range(len(counts)):
+            if h != g:
+                others = convolve(others, counts[h][0])
+
+        # fill[k] = ways to place the other mines when this group uses k
+        group_ways, tile_ways = counts[g]
+        fill = []
+        for k in range(len(group_ways)):
+            f = 0
+            for j in range(len(others)):
+                if others[j]:
+                    f += others[j] * binomial(interior, mines_left - k - j)
+            fill.append(f)
+
+        size = len(tile_ways[0])
+        mines = [0] * size
+        for k in range(len(group_ways)):
+            if fill[k]:
+                row = tile_ways[k]
+                for i in range(size):
+                    mines[i] += row[i] * fill[k]
+        tile_mines.append(mines)
+
+    return total, tile_mines, interior_mines
+
+
+##### Frontier groups and interior of a solver state (engine grid)
+# Returns (group tile lists, indexed constraints, interior tiles, safe tiles), or None when a group
+# is over engine.MAX_GROUP. The frontier code only looks at numbers > 0, but a revealed 0 with
+# covered tiles around it (flood reveal off, or a 0 the solver's rule 3 opened) says they are all
+# safe: with zeros, they get a count-0 constraint in their group, or go to the safe tiles instead
+# of the interior, where they would be counted as free to hold a mine.
+
+def board_groups(revealed, flags, zeros=True):
+    groups = []
+    tiles = []
+    in_group = set()
+
+    next_to_zero = set()
+    if zeros:
+        for y in range(engine.GRID_H):
+            for x in range(engine.GRID_W):
+                if revealed[y][x] and engine.numbers[y][x] == 0:
+                    for nx, ny in engine.NEIGHBOURS[y][x]:
+                        if not revealed[ny][nx] and not flags[ny][nx]:
+                            next_to_zero.add((nx, ny))
+
+    for group in engine.build_frontier_groups(revealed, flags):
+        group_tiles = list(group)
+        if len(group_tiles) > engine.MAX_GROUP:
+            return None
+        index = {t: i for i, t in enumerate(group_tiles)}
+        constraints = engine.extract_constraints_for_group(group, revealed, flags)
+        indexed = engine.index_constraints(constraints, index)
+
+        zero = 0
+        for t in group_tiles:
+            if t in next_to_zero:
+                zero |= 1 << index[t]
+        if zero:
+            indexed.append((zero, 0))
+
+        groups.append((len(group_tiles), indexed))
+        tiles.append(group_tiles)
+        in_group.update(group)
+
+    interior = []
+    safe = []
+    for y in range(engine.GRID_H):
+        for x in range(engine.GRID_W):
+            if not revealed[y][x] and not flags[y][x] and (x, y) not in in_group:
+                if (x, y) in next_to_zero:
+                    safe.append((x, y))
+                else:
+                    interior.append((x, y))
+
+    return tiles, groups, interior, safe
+
+def mines_left(flags):
+    return engine.MINES - sum(sum(row) for row in flags)
+
+
+##### Mine probability of every tile: 0.0 revealed, 1.0 flagged, None if it can't be worked out
+
+def probabilities(revealed, flags):
+    grid = [[1.0 if flags[y][x] else 0.0 for x in range(engine.GRID_W)] for y in range(engine.GRID_H)]
+
+    found = board_groups(revealed, flags)
+    counted = None
+    if found is not None:
+        tiles, groups, interior, _ = found # the safe tiles stay at 0.0
+        counted = count_assignments(groups, len(interior), mines_left(flags))
+    if counted is None:
+        return None
+
+    total, tile_mines, interior_mines = counted
+    for g in range(len(tiles)):
+        for i in range(len(tiles[g])):
+            x, y = tiles[g][i]
+            grid[y][x] = tile_mines[g][i] / total
+    for x, y in interior:
+        grid[y][x] = interior_mines / total
+
+    return grid
+
+
+##### rule 6 - flag / reveal every tile the mine count makes certain. Returns the tiles it changed.
+# Like rules 2-5 (and the bitboard backend's rule 6), it doesn't read the 0s the solver opened
+# itself. That only leaves out constraints, so what it finds is still certain, and the tier
+# verdicts stay what they were.
+
+def apply_count_rule(s_revealed, s_flags):
+    found = board_groups(s_revealed, s_flags, zeros=False)
+    if found is None:
+        return []
+
+    tiles, groups, interior, safe = found
+    counted = count_assignments(groups, len(interior), mines_left(s_flags))
+    if counted is None:
+        return []
+
+    total, tile_mines, interior_mines = counted
+    certain = []
+    for g in range(len(tiles)):
+        for i in range(len(tiles[g])):
+            certain.append((tiles[g][i], tile_mines[g][i]))
+    for t in interior:
+        certain.append((t, interior_mines))
+    for t in safe:
+        certain.append((t, 0))
+
+    changed = []
+    for (x, y), m in certain:
+        if m == 0:
+            s_revealed[y][x] = True
+            changed.append((x, y))
+        elif m == total:
+            s_flags[y][x] = True
+            changed.append((x, y))
+
+    return changed
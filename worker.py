@@ -0,0 +1,200 @@
+##### Board generation on the RP2040's second core
+# As soon as the grid size and difficulty are known, a _thread worker starts placing mines and
+# solving, aimed at the tile under the cursor (the most likely first click). Finished boards wait
+# in a lock-protected mailbox until the main loop takes one at the first click, or moves them into
+# the board pool afterwards. When the mailbox is full and the cursor moves to a tile none of those
+# boards serve, the oldest makes room for one that does. The worker only uses local bitboards
+# (bitboard.place_mines and bitboard.solve_tier), so it never touches the live board in engine.py.
+
+try:
+    import _thread
+except ImportError: # port without threads: everything stays on the main loop
+    _thread = None
+
+import time
+import random
+import engine
+import bitboard
+
+if not hasattr(time, "ticks_ms"): # CPython
+    from headless import clock as time
+
+
+READY_MAX = 4 # finished boards waiting in the mailbox; the worker parks when there are this many
+STOP_MS = 3000 # how long stop() waits for the attempt in progress before giving up on it
+
+_lock = _thread.allocate_lock() if _thread else None
+_wake = _thread.allocate_lock() if _thread else None # held while the worker is parked; released = wake up
+_job = None    # (dim, difficulty) being generated, None to stop
+_aim = None    # (x, y) first click to generate for, None for a random tile
+_ready = []    # (first click x, first click y, mines bitboard, first clicks it serves as a bitboard)
+_running = False
+attempts = 0
+made = {} # difficulty -> [attempts, boards that needed exactly that tier], read by metrics.py
+
+
+##### main loop side
+
+def start(dim, difficulty):
+    global _job, _running
+
+    if _thread is None:
+        return False
+
+    stop()
+    if _running: # the last worker is stuck in an attempt, and core 1 with it
+        return False
+
+    grid_w, grid_h, _ = engine.GRID_SIZES[dim]
+    bitboard.set_grid(grid_w, grid_h) # tables are only read from now on
+
+    with _lock:
+        _job = (dim, difficulty)
+
+    _running = True
+    try:
+        _thread.start_new_thread(_run, ())
+    except (OSError, RuntimeError): # core 1 is busy with something else
+        _running = False
+        _job = None
+        return False
+
+    return True
+
+def stop():
+    global _job
+
+    if _thread is None:
+        return
+
+    with _lock:
+        _job = None
+        del _ready[:]
+    _wake_up()
+
+    deadline = time.ticks_add(time.ticks_ms(), STOP_MS)
+    while _running and time.ticks_diff(deadline, time.ticks_ms()) > 0: # let the attempt in progress finish
+        time.sleep(0.005)
+
+def active():
+    return _running
+
+def _wake_up(): # the mailbox has room again, or the job changed
+    if _wake.locked(): # only the worker takes it, so it can't change under us to unlocked
+        _wake.release()
+
+def aim(cell): # (x, y) or None
+    global _aim
+
+    if _thread is not None and cell != _aim:
+        with _lock:
+            _aim = cell
+        _wake_up() # a full mailbox may have nothing for the new cell
+
+
+##### set the engine board from the mailbox for a first click at (cx, cy). Returns True if it did.
+# A board generated for another click is just as good when (cx, cy) is a 0 in the same opening,
+# so each board carries the clicks it serves: its own, and the 0s of its opening.
+
+def _serves(sx, sy, mines):
+    zero, _ = bitboard.compute_numbers(mines)
+    start = bitboard.bit(sx, sy)
+    return start | bitboard.flood(0, start, zero) & zero
+
+def take(cx, cy):
+    if _thread is None:
+        return False
+
+    with _lock:
+        boards = _ready[:]
+
+    c = bitboard.bit(cx, cy)
+    for board in boards:
+        mines, serves = board[2], board[3]
+        if serves & c:
+            with _lock:
+                if board in _ready:
+                    _ready.remove(board)
+            _wake_up()
+            engine.mines = bitboard.to_grid(mines)
+            engine.compute_numbers()
+            engine.seed = None # not from generate_board, so no seed gives it again
+            return True
+
+    return False
+
+
+##### hand finished boards over to board_pool.add(dim, difficulty, x, y, mines grid)
+
+def collect(add):
+    if _thread is None or not _ready:
+        return
+
+    with _lock:
+        job = _job
+        boards = _ready[:]
+        del _ready[:]
+    _wake_up()
+
+    for sx, sy, mines, _ in boards:
+        if job is not None:
+            add(job[0], job[1], sx, sy, bitboard.to_grid(mines))
+
+
+##### core 1
+
+def _run():
+    global _running
+
+    try:
+        _work()
+    finally: # a MemoryError or a too deep search on core 1 must not leave stop() waiting forever
+        _running = False
+
+def _work():
+    global attempts
+
+    grid_w, grid_h = bitboard._grid
+
+    while True:
+        with _lock:
+            job = _job
+            cell = _aim
+            full = len(_ready) >= READY_MAX
+            if full and cell is not None and not _serving(bitboard.bit(cell[0], cell[1])):
+                del _ready[0] # all made for where the cursor was: the oldest goes
+                full = False
+
+        if job is None:
+            break
+        if full: # park until take() / collect() / stop() / aim() makes room
+            _wake.acquire()
+            continue
+
+        dim, difficulty = job
+        if cell is None:
+            cx = random.randrange(grid_w)
+            cy = random.randrange(grid_h)
+        else:
+            cx, cy = cell
+
+        mines = bitboard.place_mines(cx, cy, engine.GRID_SIZES[dim][2])
+        ok = bitboard.solve_tier(mines, cx, cy, difficulty) == difficulty
+        serves = _serves(cx, cy, mines) if ok else 0
+
+        with _lock:
+            attempts += 1
+            m = made.get(difficulty)
+            if m is None:
+                m = made[difficulty] = [0, 0]
+            m[0] += 1
+            if ok:
+                m[1] += 1
+            if ok and _job is job:
+                _ready.append((cx, cy, mines, serves))
+
+def _serving(c): # with _lock held
+    for board in _ready:
+        if board[3] & c:
+            return True
+    return False